@@ -0,0 +1,192 @@
+# admission.py
+"""
+Admission control in front of a shared CompleteGPTOSSTutor
+ - every session has a token bucket; a session over its rate gets an
+   immediate "slow down" answer instead of a place in the queue
+ - admitted requests wait in one bounded priority queue served by a few
+   worker threads; interactive requests always go before batch ones, and
+   batch requests may only occupy `workers - 1` workers at once, so an
+   interactive question never waits behind more than one batch answer
+ - when the queue is full, a new interactive request pushes out the newest
+   queued batch request; otherwise the new request is shed with a fast
+   "busy" answer. Requests that waited longer than `max_wait` are shed too.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+INTERACTIVE = 0
+BATCH = 1
+
+BUSY_MESSAGE = "The tutor is busy right now, please ask again in a moment."
+RATE_LIMITED_MESSAGE = "You're sending questions faster than the tutor allows, please wait a moment."
+
+# Idle sessions whose buckets are full again are forgotten after this long
+SESSION_IDLE_SECONDS = 600.0
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `burst`"""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float) -> bool:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+class _Request:
+    __slots__ = ("query", "session", "priority", "enqueued", "done", "response")
+
+    def __init__(self, query: str, session: str, priority: int, enqueued: float):
+        self.query = query
+        self.session = session
+        self.priority = priority
+        self.enqueued = enqueued
+        self.done = threading.Event()
+        self.response = None
+
+    def finish(self, response: str) -> None:
+        self.response = response
+        self.done.set()
+
+
+class AdmissionController:
+    """Rate-limited, bounded, prioritized front door to tutor.generate_response"""
+
+    def __init__(self, tutor, workers: int = 2, max_queue: int = 64, max_wait: float = 2.0,
+                 rate: float = 1.0, burst: float = 5.0, batch_rate: float = 50.0, batch_burst: float = 100.0):
+        self.tutor = tutor
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.limits = {INTERACTIVE: (rate, burst), BATCH: (batch_rate, batch_burst)}
+        self.stats = {"admitted": 0, "completed": 0, "rate_limited": 0, "shed": 0, "expired": 0}
+        self._buckets = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._batch_running = 0
+        self._last_sweep = time.monotonic()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._threads = [threading.Thread(target=self._run, name=f"admission-{i}", daemon=True)
+                         for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, query: str, session: str = "default", priority: int = INTERACTIVE) -> str:
+        """Answer a query, or return a busy / rate-limited message at once"""
+        now = time.monotonic()
+        with self._cond:
+            if not self._admit_rate(session, priority, now):
+                self.stats["rate_limited"] += 1
+                return RATE_LIMITED_MESSAGE
+            if len(self._heap) >= self.max_queue and not self._shed_batch(priority):
+                self.stats["shed"] += 1
+                return BUSY_MESSAGE
+            request = _Request(query, session, priority, now)
+            heapq.heappush(self._heap, (priority, next(self._seq), request))
+            self.stats["admitted"] += 1
+            self._cond.notify()
+        # Queue wait is bounded by max_wait; leave room for the answer itself
+        if not request.done.wait(self.max_wait + 30.0):
+            return BUSY_MESSAGE
+        return request.response
+
+    def _admit_rate(self, session: str, priority: int, now: float) -> bool:
+        key = (session, priority)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            rate, burst = self.limits[priority]
+            bucket = self._buckets[key] = TokenBucket(rate, burst, now)
+        if now - self._last_sweep > SESSION_IDLE_SECONDS:
+            self._sweep(now)
+        return bucket.take(now)
+
+    def _sweep(self, now: float) -> None:
+        self._last_sweep = now
+        for key, bucket in list(self._buckets.items()):
+            if now - bucket.updated > SESSION_IDLE_SECONDS:
+                del self._buckets[key]
+
+    def _shed_batch(self, priority: int) -> bool:
+        """Make room for an interactive request by dropping the newest queued batch one"""
+        if priority != INTERACTIVE:
+            return False
+        newest = None
+        for i, (p, seq, _) in enumerate(self._heap):
+            if p == BATCH and (newest is None or seq > self._heap[newest][1]):
+                newest = i
+        if newest is None:
+            return False
+        request = self._heap[newest][2]
+        self._heap[newest] = self._heap[-1]
+        self._heap.pop()
+        heapq.heapify(self._heap)
+        self.stats["shed"] += 1
+        request.finish(BUSY_MESSAGE)
+        return True
+
+    def _next(self):
+        """Highest-priority runnable request; batch work keeps one worker free"""
+        while True:
+            if self._closed:
+                return None
+            if self._heap:
+                priority = self._heap[0][0]
+                if priority == INTERACTIVE or self._batch_running < max(1, self.workers - 1):
+                    _, _, request = heapq.heappop(self._heap)
+                    return request
+            self._cond.wait()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                request = self._next()
+                if request is None:
+                    return
+                if request.priority == BATCH:
+                    self._batch_running += 1
+            try:
+                if time.monotonic() - request.enqueued > self.max_wait:
+                    with self._cond:
+                        self.stats["expired"] += 1
+                    request.finish(BUSY_MESSAGE)
+                    continue
+                try:
+                    response = self.tutor.generate_response(request.query)
+                except Exception as e:
+                    response = f"Error: {e}"
+                with self._cond:
+                    self.stats["completed"] += 1
+                request.finish(response)
+            finally:
+                if request.priority == BATCH:
+                    with self._cond:
+                        self._batch_running -= 1
+                        self._cond.notify()
+
+    def queued(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def close(self) -> None:
+        """Stop the workers; requests still queued get the busy answer"""
+        with self._cond:
+            self._closed = True
+            pending, self._heap = self._heap, []
+            self._cond.notify_all()
+        for _, _, request in pending:
+            request.finish(BUSY_MESSAGE)
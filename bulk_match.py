@@ -0,0 +1,297 @@
+# bulk_match.py
+"""
+Bulk topic matching for offline analytics over query logs
+For every query, which topics match (not just the first one)?
+ - a chunk of queries is lowercased, windowed like the live tutor and joined
+   with newlines into one string; each topic's patterns are OR-ed into a single
+   regex that scans the whole chunk in C, and match positions are mapped back
+   to rows with bisect
+ - only patterns that can neither match nor test a newline (no `\s`, `[^...]`,
+   `\W`, `\D`, `^`, `$`, DOTALL `.`, ...) go into that chunk regex, so no match
+   can leak from one query into the next; the others are OR-ed into a second
+   regex that is run on each query alone. Either way the answers equal the
+   tutor's per-query matching
+ - chunks are spread over worker processes with a bounded number in flight,
+   so millions of rows stream through in constant memory
+ - results come back as a query x topic boolean matrix (numpy if installed,
+   else rows of 0/1 bytes) plus the first-match vector, i.e. the topic
+   find_best_match picks (section-name fallback is not applied)
+
+Usage:
+    python bulk_match.py queries.txt [--out matches.csv] [--processes 4] [--chunk-size 20000]
+`queries.txt` holds one query per line (`-` reads stdin).
+"""
+
+import argparse
+import bisect
+import collections
+import csv
+import multiprocessing
+import re
+import sys
+
+try:
+    from re import _parser as _sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse as _sre_parse
+
+from matcher import MAX_MATCH_CHARS, match_window
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEFAULT_CHUNK_SIZE = 20000
+
+# Character classes that never include a newline
+_SAFE_CATEGORIES = {"CATEGORY_DIGIT", "CATEGORY_WORD", "CATEGORY_NOT_SPACE"}
+
+_worker_topics = None
+
+
+def compile_topics(knowledge_base: dict) -> list:
+    """[(topic, combined regex), ...] in knowledge base order"""
+    return [(topic, re.compile("|".join(f"(?:{p})" for p in data["patterns"])))
+            for topic, data in knowledge_base.items()]
+
+
+def _subpatterns(value):
+    if isinstance(value, _sre_parse.SubPattern):
+        yield value
+    elif isinstance(value, (tuple, list)):
+        for item in value:
+            yield from _subpatterns(item)
+
+
+def _class_has_newline(items) -> bool:
+    for op, av in items:
+        op = str(op)
+        if (op == "NEGATE" or (op == "LITERAL" and av == 10) or (op == "RANGE" and av[0] <= 10 <= av[1])
+                or (op == "CATEGORY" and str(av) not in _SAFE_CATEGORIES)):
+            return True
+    return False
+
+
+def _sees_newline(items, dotall: bool) -> bool:
+    for op, av in items:
+        op = str(op)
+        if op == "ANY":
+            found = dotall
+        elif op == "LITERAL":
+            found = av == 10
+        elif op == "NOT_LITERAL":
+            found = av != 10
+        elif op == "IN":
+            found = _class_has_newline(av)
+        elif op == "AT":
+            found = str(av) not in ("AT_BOUNDARY", "AT_NON_BOUNDARY")
+        elif op == "SUBPATTERN":
+            _, add_flags, del_flags, sub = av
+            found = _sees_newline(sub, (dotall or bool(add_flags & re.DOTALL)) and not del_flags & re.DOTALL)
+        else:
+            found = any(_sees_newline(sub, dotall) for sub in _subpatterns(av))
+        if found:
+            return True
+    return False
+
+
+def chunk_safe(pattern: str) -> bool:
+    """True if `pattern` can neither match nor look at a newline, so it gives the
+    same answers on a newline-joined chunk as on each query alone"""
+    try:
+        parsed = _sre_parse.parse(pattern)
+    except Exception:
+        return False
+    flags = (parsed.state if hasattr(parsed, "state") else parsed.pattern).flags
+    return not _sees_newline(parsed, bool(flags & re.DOTALL))
+
+
+def compile_chunk_topics(knowledge_base: dict) -> list:
+    """
+    [(topic, chunk regex, per-query regex), ...] in knowledge base order; the
+    chunk regex ORs the chunk_safe() patterns, the per-query regex the rest,
+    and either is None when it has no patterns
+    """
+    compiled = []
+    for topic, data in knowledge_base.items():
+        safe = [p for p in data["patterns"] if chunk_safe(p)]
+        unsafe = [p for p in data["patterns"] if not chunk_safe(p)]
+        compiled.append((topic, *(re.compile("|".join(f"(?:{p})" for p in group)) if group else None
+                                  for group in (safe, unsafe))))
+    return compiled
+
+
+def _as_matrix(rows: list, n_topics: int):
+    """Rows of 0/1 bytes as an (n, topics) bool array, or the rows themselves without numpy"""
+    if np is None:
+        return rows
+    return np.frombuffer(b"".join(bytes(r) for r in rows), dtype=np.bool_).reshape(len(rows), n_topics)
+
+
+class BulkResult:
+    """Match matrix and first-match vector for one chunk of queries"""
+
+    def __init__(self, start: int, topics: list, rows: list, first: list):
+        self.start = start
+        self.topics = topics
+        self.rows = rows
+        self.first = first
+
+    def __len__(self) -> int:
+        return len(self.first)
+
+    @property
+    def matrix(self):
+        return _as_matrix(self.rows, len(self.topics))
+
+    def first_topic(self, i: int):
+        index = self.first[i]
+        return self.topics[index] if index >= 0 else None
+
+
+def match_chunk(compiled: list, queries: list, window: int = MAX_MATCH_CHARS):
+    """
+    Match one chunk; returns (rows, first) where rows[i] is a bytearray with
+    one 0/1 byte per topic and first[i] the index of the first match or -1
+    """
+    texts = [match_window(q, window).lower() for q in queries]
+    starts, pos = [], 0
+    for text in texts:
+        starts.append(pos)
+        pos += len(text) + 1
+    blob = "\n".join(texts)
+
+    n_topics = len(compiled)
+    rows = [bytearray(n_topics) for _ in texts]
+    for column, (_, chunk_regex, query_regex) in enumerate(compiled):
+        if chunk_regex is not None:
+            for match in chunk_regex.finditer(blob):
+                rows[bisect.bisect_right(starts, match.start()) - 1][column] = 1
+        if query_regex is not None:
+            search = query_regex.search
+            for row, text in zip(rows, texts):
+                if not row[column] and search(text):
+                    row[column] = 1
+
+    first = [row.find(1) for row in rows]
+    return rows, first
+
+
+def _init_worker(knowledge_base: dict) -> None:
+    global _worker_topics
+    _worker_topics = compile_chunk_topics(knowledge_base)
+
+
+def _worker_chunk(args):
+    start, queries = args
+    rows, first = match_chunk(_worker_topics, queries)
+    return start, [bytes(r) for r in rows], first
+
+
+def _chunked(queries, size: int):
+    chunk, start = [], 0
+    for query in queries:
+        chunk.append(query)
+        if len(chunk) >= size:
+            yield start, chunk
+            start += len(chunk)
+            chunk = []
+    if chunk:
+        yield start, chunk
+
+
+def iter_bulk_matches(queries, knowledge_base: dict = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      processes: int = None):
+    """
+    Stream BulkResult chunks, in input order, for any iterable of queries.
+    processes=1 matches in this process; otherwise a pool with at most two
+    chunks per worker in flight keeps memory bounded.
+    """
+    if knowledge_base is None:
+        from knowledge_base import knowledge_base
+    topics = list(knowledge_base)
+    processes = processes or multiprocessing.cpu_count()
+
+    if processes <= 1:
+        compiled = compile_chunk_topics(knowledge_base)
+        for start, chunk in _chunked(queries, chunk_size):
+            rows, first = match_chunk(compiled, chunk)
+            yield BulkResult(start, topics, rows, first)
+        return
+
+    with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(knowledge_base,)) as pool:
+        in_flight = collections.deque()
+        for item in _chunked(queries, chunk_size):
+            in_flight.append(pool.apply_async(_worker_chunk, (item,)))
+            if len(in_flight) >= processes * 2:
+                start, rows, first = in_flight.popleft().get()
+                yield BulkResult(start, topics, rows, first)
+        while in_flight:
+            start, rows, first = in_flight.popleft().get()
+            yield BulkResult(start, topics, rows, first)
+
+
+def bulk_match(queries: list, knowledge_base: dict = None, **kwargs):
+    """
+    Whole-array convenience wrapper: (topics, matrix, first) for a list of
+    queries. Use iter_bulk_matches for inputs that don't fit in memory.
+    """
+    if knowledge_base is None:
+        from knowledge_base import knowledge_base
+    rows, first = [], []
+    for result in iter_bulk_matches(queries, knowledge_base, **kwargs):
+        rows.extend(result.rows)
+        first.extend(result.first)
+    if np is not None:
+        first = np.asarray(first, dtype=np.int32)
+    return list(knowledge_base), _as_matrix(rows, len(knowledge_base)), first
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Match every logged query against every topic")
+    parser.add_argument("queries", help="file with one query per line, or - for stdin")
+    parser.add_argument("--out", help="write a CSV of per-query matches here")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.queries == "-" else open(args.queries, encoding="utf-8", errors="replace")
+    queries = (line.rstrip("\r\n") for line in source)
+
+    total, misses, any_counts, first_counts, topics = 0, 0, None, None, None
+    out = open(args.out, "w", newline="", encoding="utf-8") if args.out else None
+    writer = csv.writer(out) if out else None
+    try:
+        for result in iter_bulk_matches(queries, chunk_size=args.chunk_size, processes=args.processes):
+            if topics is None:
+                topics = result.topics
+                any_counts = [0] * len(topics)
+                first_counts = [0] * len(topics)
+                if writer:
+                    writer.writerow(["row", "first_match"] + topics)
+            for i in range(len(result)):
+                flags = list(result.rows[i])
+                for column, flag in enumerate(flags):
+                    any_counts[column] += flag
+                if result.first[i] < 0:
+                    misses += 1
+                else:
+                    first_counts[result.first[i]] += 1
+                if writer:
+                    writer.writerow([result.start + i, result.first_topic(i) or ""] + flags)
+            total += len(result)
+    finally:
+        if out:
+            out.close()
+        if source is not sys.stdin:
+            source.close()
+
+    print(f"{total} queries, {misses} misses ({100.0 * misses / max(total, 1):.1f}%)")
+    for column, topic in enumerate(topics or []):
+        print(f"  {topic:<24} matches {any_counts[column]:>9}   answered first {first_counts[column]:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+# code_review.py
+"""
+Static performance review of pasted Python code
+Parses the code once with `ast` and walks it in a single pass (linear in the
+size of the code) looking for the slow patterns the knowledge base has a
+faster variant for:
+ - naive exponential recursion, f(n - 1) + f(n - 2) without memoization
+   -> fibonacci_memo / fibonacci_iterative
+ - file.readlines() / file.read().splitlines(), which load the whole file
+   -> count_lines (iterates over the file object)
+ - string += inside a loop, which copies the string every time -> "".join()
+ - file.write() once per item inside a loop -> write_to_file (one write
+   of the whole text)
+Results are cached by the hash of the source, so a paste that is sent again
+(or re-rendered) is not parsed twice.
+
+Usage:
+    python code_review.py my_script.py
+"""
+
+import ast
+import collections
+import hashlib
+import re
+import sys
+import threading
+
+CACHE_SIZE = 256
+MAX_FINDINGS = 50
+
+_FENCE_RE = re.compile(r"```(?:python|py)?\n(.*?)```", re.DOTALL)
+# Cheap pre-check so ordinary questions never reach the parser
+_CODE_HINT_RE = re.compile(r"^[ \t]*(def |class |for |while |with |import |from \S+ import )|\.readlines\(|\.write\(",
+                           re.MULTILINE)
+_CODE_START_RE = re.compile(r"^(def |class |import |from |for |while |with |@|[A-Za-z_]\w* *=)")
+
+_MEMO_DECORATORS = {"lru_cache", "cache", "memoize", "memoized"}
+_MEMO_PARAMS = {"memo", "cache", "seen", "table", "dp"}
+
+# rule -> (knowledge base topic, faster variant in that topic, advice)
+RULES = {
+    "exponential_recursion": (
+        "fibonacci", "fibonacci_memo",
+        "calls itself twice with n-1 and n-2, so the same values are recomputed "
+        "exponentially often (O(1.6^n)); memoize it or loop instead",
+    ),
+    "readlines": (
+        "file_operations", "count_lines",
+        "loads the whole file into memory at once; iterate over the file object "
+        "line by line instead",
+    ),
+    "string_concat_in_loop": (
+        None, None,
+        "inside a loop copies the whole string every time (quadratic); "
+        "collect the pieces in a list and \"\".join() them once",
+    ),
+    "write_in_loop": (
+        "file_operations", "write_to_file",
+        "runs once per item; build the text first and write it once, "
+        "e.g. file.write(\"\\n\".join(lines)) or file.writelines(...)",
+    ),
+}
+
+
+class Finding:
+    """One flagged spot in the reviewed code"""
+
+    __slots__ = ("rule", "line", "subject")
+
+    def __init__(self, rule: str, line: int, subject: str):
+        self.rule = rule
+        self.line = line
+        self.subject = subject
+
+    @property
+    def topic(self):
+        return RULES[self.rule][0]
+
+    @property
+    def variant(self):
+        return RULES[self.rule][1]
+
+    @property
+    def advice(self) -> str:
+        return RULES[self.rule][2]
+
+    def __repr__(self) -> str:
+        return f"Finding({self.rule}, line {self.line}, {self.subject!r})"
+
+
+def _call_name(node) -> str:
+    if isinstance(node.func, ast.Name):
+        return node.func.id
+    if isinstance(node.func, ast.Attribute):
+        return node.func.attr
+    return ""
+
+
+def _describe(node) -> str:
+    """Dotted name of an expression like `f` or `self.out`, for messages"""
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return _describe(node.value) + "." + node.attr
+    if isinstance(node, ast.Call):
+        return _describe(node.func) + "(...)"
+    return "..."
+
+
+def _is_memoized(node) -> bool:
+    for decorator in node.decorator_list:
+        target = decorator.func if isinstance(decorator, ast.Call) else decorator
+        name = target.attr if isinstance(target, ast.Attribute) else getattr(target, "id", "")
+        if name in _MEMO_DECORATORS:
+            return True
+    params = node.args.posonlyargs + node.args.args + node.args.kwonlyargs
+    return any(arg.arg in _MEMO_PARAMS for arg in params)
+
+
+def _is_string_value(node, string_names: set) -> bool:
+    if isinstance(node, ast.Constant):
+        return isinstance(node.value, str)
+    if isinstance(node, ast.JoinedStr):
+        return True
+    if isinstance(node, ast.Call):
+        return isinstance(node.func, ast.Name) and node.func.id in ("str", "repr", "chr")
+    if isinstance(node, ast.Name):
+        return node.id in string_names
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        return _is_string_value(node.left, string_names) or _is_string_value(node.right, string_names)
+    return False
+
+
+class _Reviewer(ast.NodeVisitor):
+    """Single pass; per-function state lives on small stacks"""
+
+    def __init__(self):
+        self.findings = []
+        self.seen = set()
+        self.functions = []     # [(name, memoized, self-calls on n - const)]
+        self.string_names = [set()]
+        self.loops = []         # line numbers of the enclosing loops
+
+    def add(self, rule: str, line: int, subject: str, key=None) -> None:
+        key = key or (rule, line)
+        if key not in self.seen and len(self.findings) < MAX_FINDINGS:
+            self.seen.add(key)
+            self.findings.append(Finding(rule, line, subject))
+
+    def visit_FunctionDef(self, node):
+        self.functions.append([node.name, _is_memoized(node), 0])
+        self.string_names.append(set())
+        loops, self.loops = self.loops, []
+        self.generic_visit(node)
+        self.loops = loops
+        self.string_names.pop()
+        name, memoized, calls = self.functions.pop()
+        if calls >= 2 and not memoized:
+            self.add("exponential_recursion", node.lineno, f"{name}()")
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Lambda(self, node):
+        self.functions.append(["<lambda>", True, 0])
+        self.generic_visit(node)
+        self.functions.pop()
+
+    def _visit_loop(self, node):
+        self.loops.append(node.lineno)
+        self.generic_visit(node)
+        self.loops.pop()
+
+    visit_For = visit_AsyncFor = visit_While = _visit_loop
+    visit_ListComp = visit_SetComp = visit_DictComp = visit_GeneratorExp = _visit_loop
+
+    def visit_Assign(self, node):
+        if _is_string_value(node.value, self.string_names[-1]):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    self.string_names[-1].add(target.id)
+        self.generic_visit(node)
+
+    def visit_AugAssign(self, node):
+        if (self.loops and isinstance(node.op, ast.Add) and isinstance(node.target, ast.Name)
+                and (node.target.id in self.string_names[-1]
+                     or _is_string_value(node.value, self.string_names[-1]))):
+            self.add("string_concat_in_loop", node.lineno, f"{node.target.id} += ...",
+                     key=("string_concat_in_loop", node.target.id, self.loops[-1]))
+        self.generic_visit(node)
+
+    def visit_Call(self, node):
+        name = _call_name(node)
+        if self.functions and isinstance(node.func, ast.Name) and name == self.functions[-1][0]:
+            first = node.args[0] if node.args else None
+            if (isinstance(first, ast.BinOp) and isinstance(first.op, ast.Sub)
+                    and isinstance(first.right, ast.Constant)):
+                self.functions[-1][2] += 1
+        if isinstance(node.func, ast.Attribute):
+            if name == "readlines" and not node.args:
+                self.add("readlines", node.lineno, f"{_describe(node.func.value)}.readlines()")
+            elif (name == "splitlines" and isinstance(node.func.value, ast.Call)
+                  and _call_name(node.func.value) == "read" and not node.func.value.args):
+                self.add("readlines", node.lineno, f"{_describe(node.func.value.func.value)}.read().splitlines()")
+            elif name == "write" and self.loops:
+                target = f"{_describe(node.func.value)}.write()"
+                self.add("write_in_loop", node.lineno, target, key=("write_in_loop", target, self.loops[-1]))
+        self.generic_visit(node)
+
+
+def extract_code(text: str) -> str:
+    """The Python code in a paste: fenced blocks, the whole text, or from the first code line on"""
+    fenced = _FENCE_RE.findall(text)
+    if fenced:
+        return "\n".join(fenced)
+    if not _CODE_HINT_RE.search(text):
+        return ""
+    lines = text.split("\n")
+    start = next((i for i, line in enumerate(lines) if _CODE_START_RE.match(line)), 0)
+    return "\n".join(lines[start:])
+
+
+def _parse(source: str):
+    try:
+        return ast.parse(source)
+    except SyntaxError as e:
+        # Often a question or traceback after the code: retry once without it
+        if not e.lineno or e.lineno < 2:
+            return None
+        try:
+            return ast.parse("\n".join(source.split("\n")[:e.lineno - 1]))
+        except (SyntaxError, ValueError, RecursionError, MemoryError):
+            return None
+    except (ValueError, RecursionError, MemoryError):
+        return None
+
+
+def _review(source: str) -> list:
+    tree = _parse(source)
+    if tree is None:
+        return []
+    reviewer = _Reviewer()
+    try:
+        reviewer.visit(tree)
+    except RecursionError:
+        pass  # absurdly nested code: keep what was found so far
+    return sorted(reviewer.findings, key=lambda f: f.line)
+
+
+_cache = collections.OrderedDict()
+_lock = threading.Lock()
+
+
+def review(source: str) -> list:
+    """Cached findings for one piece of source code"""
+    key = hashlib.sha256(source.encode("utf-8", "surrogatepass")).hexdigest()
+    with _lock:
+        findings = _cache.get(key)
+        if findings is not None:
+            _cache.move_to_end(key)
+            return findings
+    findings = _review(source)
+    with _lock:
+        _cache[key] = findings
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return findings
+
+
+def review_text(text: str) -> list:
+    """Findings for the code in a user message; [] when it holds no parsable code"""
+    code = extract_code(text)
+    return review(code) if code else []
+
+
+def format_findings(findings: list, topics=None) -> str:
+    """One line per finding; links are left out for topics not in `topics` (when given)"""
+    lines = ["Performance review of your code:"]
+    for finding in findings:
+        line = f"  line {finding.line}: {finding.subject} {finding.advice}"
+        if finding.topic and (topics is None or finding.topic in topics):
+            line += f" (see {finding.variant} in '{finding.topic}')"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print("Usage: python code_review.py FILE.py")
+        return 2
+    with open(argv[0], encoding="utf-8", errors="replace") as f:
+        findings = review(f.read())
+    print(format_findings(findings) if findings else "No performance issues found.")
+    return 1 if findings else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+# generation.py
+"""
+Local text generation for questions the knowledge base has no topic for
+Retrieval stays the default path; a Generator is only asked when
+find_best_match misses, and only when one is enabled
+(tutor.enable_generation(), TUTOR_GENERATION, or `--generate` on the CLI).
+ - backends implement GenerationBackend.generate(prompt, max_tokens, deadline)
+ - StubBackend is deterministic and instant (or delayed on purpose), for
+   tests and demos without a model, GPU or network
+ - LlamaCppBackend runs a CPU-quantized GGUF model (e.g. a gpt-oss-20b
+   quantization) through the optional `llama_cpp` package
+ - the whole prompt (question plus at most MAX_PROMPT_TOPICS topic names) and
+   the answer are held to token budgets counted with the tutor's own
+   tokenizer, each request has a timeout, and answers are cached per
+   (backend, normalized question, budget)
+
+Backend specs: "stub", "llama:/path/to/model.gguf"
+"""
+
+import collections
+import itertools
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from response_cache import normalize_query
+
+MAX_PROMPT_TOKENS = 512
+MAX_NEW_TOKENS = 256
+# Topic names offered as context; the rest of the knowledge base is left out
+MAX_PROMPT_TOPICS = 64
+TIMEOUT_SECONDS = 20.0
+CACHE_SIZE = 256
+# Generation is CPU-heavy; more requests than this wait for retrieval-only replies
+MAX_CONCURRENT = 1
+
+SYSTEM_PROMPT = (
+    "You are a patient Python programming tutor. Answer the student's question "
+    "with a short explanation and one small, runnable Python example."
+)
+
+
+def truncate_to_tokens(text: str, limit: int, count) -> str:
+    """Longest prefix of `text` that `count` says fits in `limit` tokens"""
+    if count(text) <= limit:
+        return text
+    low, high = 0, len(text)
+    # Binary search on characters: O(log n) tokenizer calls instead of one per word
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count(text[:middle]) <= limit:
+            low = middle
+        else:
+            high = middle - 1
+    cut = text[:low]
+    space = cut.rfind(" ")
+    return cut[:space] if space > len(cut) // 2 else cut
+
+
+def build_prompt(question: str, topics=()) -> str:
+    lines = [SYSTEM_PROMPT]
+    if topics:
+        lines.append("Topics with ready-made examples: " + ", ".join(topics) + ".")
+    lines += ["", f"Student: {question}", "Tutor:"]
+    return "\n".join(lines)
+
+
+def fit_prompt(question: str, topics, limit: int, count) -> str:
+    """
+    build_prompt() held to `limit` tokens: the question is cut to what the
+    instructions leave room for, then as many topic names as still fit
+    """
+    room = limit - count(build_prompt("", ()))
+    question = truncate_to_tokens(question, max(room, 0), count)
+    topics = list(itertools.islice(topics, MAX_PROMPT_TOPICS))
+    low, high = 0, len(topics)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count(build_prompt(question, topics[:middle])) <= limit:
+            low = middle
+        else:
+            high = middle - 1
+    return build_prompt(question, topics[:low])
+
+
+class GenerationBackend(ABC):
+    """A local text generator; `generate` must stop by `deadline` (time.monotonic())"""
+
+    name = "backend"
+
+    @abstractmethod
+    def generate(self, prompt: str, max_tokens: int, deadline: float) -> str:
+        """Answer text for `prompt`, at most about `max_tokens` tokens"""
+
+
+class StubBackend(GenerationBackend):
+    """Deterministic stand-in: the same question always gets the same answer"""
+
+    name = "stub"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def generate(self, prompt: str, max_tokens: int, deadline: float) -> str:
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        question = prompt.rsplit("Student: ", 1)[-1].rsplit("\nTutor:", 1)[0].strip()
+        return (f"I don't have a worked example for \"{question}\" yet. Break the problem "
+                "into small functions, try each one in the interpreter with a couple of "
+                "inputs, and ask again about any step that matches a topic I know.")
+
+
+class LlamaCppBackend(GenerationBackend):
+    """GGUF model on the CPU through llama-cpp-python (pip install llama-cpp-python)"""
+
+    def __init__(self, model_path: str, n_ctx: int = 2048, n_threads: int = None):
+        try:
+            from llama_cpp import Llama
+        except ImportError:
+            raise RuntimeError("the llama backend needs llama-cpp-python (pip install llama-cpp-python)")
+        self.name = f"llama:{os.path.basename(model_path)}"
+        self._llama = Llama(model_path=model_path, n_ctx=n_ctx, n_threads=n_threads, verbose=False)
+        self._lock = threading.Lock()
+
+    def generate(self, prompt: str, max_tokens: int, deadline: float) -> str:
+        pieces = []
+        with self._lock:
+            # Streamed so the deadline is checked between tokens
+            for chunk in self._llama(prompt, max_tokens=max_tokens, stop=["\nStudent:"], stream=True):
+                pieces.append(chunk["choices"][0]["text"])
+                if time.monotonic() > deadline:
+                    break
+        return "".join(pieces).strip()
+
+
+def make_backend(spec: str) -> GenerationBackend:
+    if spec == "stub":
+        return StubBackend()
+    if spec.startswith("llama:"):
+        return LlamaCppBackend(spec[len("llama:"):])
+    raise ValueError(f"unknown generation backend '{spec}' (stub or llama:PATH)")
+
+
+class Generator:
+    """Budgeted, time-limited, cached generation on top of a backend"""
+
+    def __init__(self, backend: GenerationBackend, count_tokens, max_prompt_tokens: int = MAX_PROMPT_TOKENS,
+                 max_new_tokens: int = MAX_NEW_TOKENS, timeout: float = TIMEOUT_SECONDS,
+                 cache_size: int = CACHE_SIZE):
+        self.backend = backend
+        self.count_tokens = count_tokens
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_new_tokens = max_new_tokens
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(MAX_CONCURRENT)
+
+    def respond(self, question: str, topics=()) -> dict:
+        """{"status": ok|timeout|busy|error, "text", "tokens", "seconds", "cached"}"""
+        key = (self.backend.name, normalize_query(question), self.max_new_tokens)
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+                return dict(hit, cached=True)
+
+        if not self._slots.acquire(blocking=False):
+            return {"status": "busy", "text": "", "tokens": 0, "seconds": 0.0, "cached": False}
+        started = time.monotonic()
+        deadline = started + self.timeout
+        prompt = fit_prompt(question, topics, self.max_prompt_tokens, self.count_tokens)
+        outcome = {}
+
+        def run():
+            try:
+                outcome["text"] = self.backend.generate(prompt, self.max_new_tokens, deadline)
+            except Exception as e:
+                outcome["error"] = f"{type(e).__name__}: {e}"
+            finally:
+                # Released here, not by the caller, so a timed-out call still holds its slot
+                self._slots.release()
+
+        worker = threading.Thread(target=run, name="tutor-generation", daemon=True)
+        worker.start()
+        worker.join(self.timeout)
+        seconds = time.monotonic() - started
+        if "text" not in outcome:
+            status = "error" if "error" in outcome else "timeout"
+            return {"status": status, "text": outcome.get("error", ""), "tokens": 0,
+                    "seconds": seconds, "cached": False}
+
+        text = truncate_to_tokens(outcome["text"], self.max_new_tokens, self.count_tokens)
+        result = {"status": "ok", "text": text, "tokens": self.count_tokens(text), "seconds": seconds}
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return dict(result, cached=False)
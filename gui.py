@@ -2,21 +2,52 @@
 Improved GPT-OSS Programming Tutor GUI using Tkinter
 Design: Modern AI Chatbox (ChatGPT / Copilot inspired)
 Enhanced with color-coded messages for clarity
+The tutor engine loads in a background thread so the window paints at once;
+questions asked meanwhile are queued and answered when the engine is ready.
+Topic suggestions appear under the input box as you type; they are computed
+by a worker thread from a prefix index (suggest.py), debounced per keystroke.
+Code blocks are syntax highlighted from spans cached per snippet (highlight.py).
 """
 
 import tkinter as tk
 from tkinter import scrolledtext, ttk
 import importlib.util
-import os, threading, queue, time, re
+import os, sys, threading, queue, time, re
+
+# tutor.py next to this file, unless overridden by --framework or $TUTOR_FRAMEWORK_PATH
+DEFAULT_FRAMEWORK_PATH = os.environ.get("TUTOR_FRAMEWORK_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "tutor.py")
+
+QUICK_EXAMPLES = [
+    "Create a BankAccount class",
+    "Write a recursive Fibonacci function",
+    "Count lines in a text file",
+    "Validate email addresses using regex",
+    "Check if a number is prime",
+    "Merge two dictionaries",
+    "Write a list of strings to a file",
+]
+
+# Milliseconds of typing pause before suggestions are computed
+SUGGEST_DELAY_MS = 120
+_NAV_KEYS = {"Up", "Down", "Return", "Escape", "Tab", "Left", "Right", "Home", "End"}
 
 
 class TutorGUI:
-    def __init__(self, root):
+    def __init__(self, root, framework_path=None):
         self.root = root
         self.tutor = None
+        self.framework_path = framework_path or DEFAULT_FRAMEWORK_PATH
+        self.loading = True
+        self.pending_queries = []
         self.response_queue = queue.Queue()
+        self.suggestion_index = None
+        self.suggest_requests = queue.Queue()
+        self._suggest_after = None
         self.setup_gui()
-        self.load_tutor_framework()
+        threading.Thread(target=self.suggestion_worker, daemon=True).start()
+        # Load the engine off the Tk thread so the window paints immediately
+        threading.Thread(target=self.load_tutor_framework, daemon=True).start()
 
     def setup_gui(self):
         """Setup Tkinter GUI"""
@@ -51,6 +82,14 @@ class TutorGUI:
         self.chat_text.tag_configure("error", foreground="#e06c75", font=("Consolas", 11, "bold"))
         self.chat_text.tag_configure("info", foreground="#abb2bf", font=("Consolas", 11, "italic"))
         self.chat_text.tag_configure("code", foreground="#e5c07b", background="#3e4451")
+        # Syntax colors, configured after "code" so they take priority over it
+        self.chat_text.tag_configure("py_keyword", foreground="#c678dd")
+        self.chat_text.tag_configure("py_builtin", foreground="#56b6c2")
+        self.chat_text.tag_configure("py_defname", foreground="#61afef")
+        self.chat_text.tag_configure("py_string", foreground="#98c379")
+        self.chat_text.tag_configure("py_number", foreground="#d19a66")
+        self.chat_text.tag_configure("py_comment", foreground="#7f848e", font=("Consolas", 11, "italic"))
+        self.chat_text.tag_configure("py_decorator", foreground="#e5c07b")
 
         # Input frame
         input_frame = tk.Frame(self.root, bg="#202123")
@@ -66,6 +105,19 @@ class TutorGUI:
 
         # 🔹 Pressing Enter triggers send_message
         self.input_entry.bind("<Return>", lambda e: self.send_message())
+        self.input_entry.bind("<KeyRelease>", self.on_input_key)
+        self.input_entry.bind("<Down>", self.focus_suggestions)
+        self.input_entry.bind("<Escape>", lambda e: self.hide_suggestions())
+
+        # Suggestions dropdown, placed under the input box while there is something to show
+        self.suggest_box = tk.Listbox(
+            self.root, font=("Segoe UI", 11), bg="#343541", fg="white",
+            selectbackground="#10a37f", relief="flat", activestyle="none"
+        )
+        self.suggest_box.bind("<Return>", self.apply_suggestion)
+        self.suggest_box.bind("<Double-Button-1>", self.apply_suggestion)
+        self.suggest_box.bind("<Escape>", lambda e: (self.hide_suggestions(), self.input_entry.focus_set()))
+        self.suggestions = []
 
         send_btn = tk.Button(
             input_frame, text="Send",
@@ -77,16 +129,17 @@ class TutorGUI:
         )
         send_btn.pack(side=tk.RIGHT)
 
+        run_btn = tk.Button(
+            input_frame, text="▶ Run Example",
+            font=("Segoe UI", 11, "bold"),
+            bg="#40414f", fg="white",
+            activebackground="#565869",
+            relief="flat", padx=10, pady=5,
+            command=self.run_example
+        )
+        run_btn.pack(side=tk.RIGHT, padx=(0, 8))
+
         # Quick examples dropdown
-        examples = [
-            "Create a BankAccount class",
-            "Write a recursive Fibonacci function",
-            "Count lines in a text file",
-            "Validate email addresses using regex",
-            "Check if a number is prime",
-            "Merge two dictionaries",
-            "Write a list of strings to a file",
-        ]
         examples_frame = tk.Frame(self.root, bg="#202123")
         examples_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
 
@@ -96,13 +149,13 @@ class TutorGUI:
         self.example_var = tk.StringVar()
         example_combo = ttk.Combobox(
             examples_frame, textvariable=self.example_var,
-            values=examples, width=60, state="readonly"
+            values=QUICK_EXAMPLES, width=60, state="readonly"
         )
         example_combo.pack(side=tk.LEFT, padx=(10, 0))
         example_combo.bind("<<ComboboxSelected>>", self.on_example_selected)
 
         # Bottom status bar
-        self.status_var = tk.StringVar(value="✅ Ready")
+        self.status_var = tk.StringVar(value="⏳ Loading tutor framework...")
         status_bar = tk.Label(
             self.root, textvariable=self.status_var,
             font=("Segoe UI", 9), anchor="w",
@@ -118,11 +171,12 @@ class TutorGUI:
         return welcome
 
     def load_tutor_framework(self):
-        """Load tutor from external file (tutor.py)"""
+        """Load tutor from external file (tutor.py); runs in a background thread"""
+        status = lambda text: self.response_queue.put(("status", text))
         try:
-            framework_path = r"C:\Users\user\Downloads\python_tutor\tutor.py"
+            framework_path = self.framework_path
             if not os.path.exists(framework_path):
-                self.status_var.set("❌ Framework not found!")
+                status("❌ Framework not found!")
                 return False
 
             spec = importlib.util.spec_from_file_location("tutor_framework", framework_path)
@@ -131,15 +185,119 @@ class TutorGUI:
 
             tutor_class = getattr(tutor_module, "CompleteGPTOSSTutor", None)
             if tutor_class:
-                self.tutor = tutor_class()
-                self.status_var.set("✅ Framework loaded successfully")
+                status("⏳ Preparing knowledge base...")
+                tutor = tutor_class()
+                # Pre-warm sandbox workers so "Run Example" answers without a cold start
+                if hasattr(tutor, "start_example_pool"):
+                    threading.Thread(target=tutor.start_example_pool, daemon=True).start()
+                # Pick up knowledge base edits during class without a restart
+                if hasattr(tutor, "start_hot_reload"):
+                    tutor.start_hot_reload()
+                self.build_suggestions(tutor)
+                # Highlight every knowledge base snippet before it is first shown
+                threading.Thread(target=self.warm_highlighting, args=(tutor,), daemon=True).start()
+                status("⏳ Loading tokenizer...")
+                getattr(tutor, "tokenizer", None)  # waits for the background tokenizer load
+                self.tutor = tutor
+                status("✅ Framework loaded successfully")
                 return True
             else:
-                self.status_var.set("❌ Tutor class not found")
+                status("❌ Tutor class not found")
                 return False
         except Exception as e:
-            self.status_var.set(f"❌ Load error: {str(e)}")
+            status(f"❌ Load error: {str(e)}")
             return False
+        finally:
+            self.response_queue.put(("loaded", None))
+
+    def warm_highlighting(self, tutor):
+        try:
+            from highlight import warm
+            for text in tutor.snapshot.rendered.values():
+                warm(text)
+        except Exception:
+            pass
+
+    def build_suggestions(self, tutor):
+        """(Re)build the suggestion index from the tutor's current knowledge base"""
+        try:
+            from suggest import SuggestionIndex
+            self.suggestion_index = SuggestionIndex.from_tutor(tutor, QUICK_EXAMPLES)
+        except Exception:
+            self.suggestion_index = None
+
+    def suggestion_worker(self):
+        """Compute suggestions off the Tk thread, only for the latest input"""
+        while True:
+            text = self.suggest_requests.get()
+            while not self.suggest_requests.empty():
+                text = self.suggest_requests.get_nowait()
+            index, tutor = self.suggestion_index, self.tutor
+            # Follow hot reloads of the knowledge base
+            if tutor is not None and index is not None and index.version != tutor.snapshot.version:
+                self.build_suggestions(tutor)
+                index = self.suggestion_index
+            results = index.suggest(text) if index is not None else []
+            self.response_queue.put(("suggestions", (text, results)))
+
+    def on_input_key(self, event):
+        """Debounce keystrokes before asking for suggestions"""
+        if event.keysym in _NAV_KEYS:
+            return
+        if self._suggest_after is not None:
+            self.root.after_cancel(self._suggest_after)
+        self._suggest_after = self.root.after(SUGGEST_DELAY_MS, self.request_suggestions)
+
+    def request_suggestions(self):
+        self._suggest_after = None
+        text = self.input_var.get()
+        if text.strip():
+            self.suggest_requests.put(text)
+        else:
+            self.hide_suggestions()
+
+    def show_suggestions(self, text, results):
+        # Drop answers for input that has changed since
+        if text != self.input_var.get() or not results:
+            self.hide_suggestions()
+            return
+        self.suggestions = results
+        self.suggest_box.delete(0, tk.END)
+        for phrase, topic in results:
+            self.suggest_box.insert(tk.END, f"{phrase}   → {topic}")
+        self.suggest_box.config(height=len(results))
+        self.suggest_box.place(in_=self.input_entry, relx=0, rely=1.0, y=2, relwidth=1.0)
+        self.suggest_box.lift()
+
+    def hide_suggestions(self):
+        self.suggestions = []
+        self.suggest_box.place_forget()
+
+    def focus_suggestions(self, event=None):
+        if self.suggestions:
+            self.suggest_box.focus_set()
+            self.suggest_box.selection_clear(0, tk.END)
+            self.suggest_box.selection_set(0)
+            self.suggest_box.activate(0)
+        return "break"
+
+    def apply_suggestion(self, event=None):
+        selection = self.suggest_box.curselection()
+        if selection and self.suggestions:
+            self.input_var.set(self.suggestions[selection[0]][0])
+        self.hide_suggestions()
+        self.input_entry.focus_set()
+        self.input_entry.icursor(tk.END)
+        return "break"
+
+    def on_framework_loaded(self):
+        """Answer the questions that were asked while the engine was loading"""
+        self.loading = False
+        pending, self.pending_queries = self.pending_queries, []
+        if pending:
+            self.status_var.set("⏳ Thinking...")
+        for query in pending:
+            threading.Thread(target=self.process_response, args=(query,), daemon=True).start()
 
     def send_message(self):
         query = self.input_var.get().strip()
@@ -148,21 +306,59 @@ class TutorGUI:
         # Insert user message and stay at that position
         self.update_chat("user", query, autoscroll=False)
         self.input_var.set("")
+        self.hide_suggestions()
+        if self.loading:
+            self.pending_queries.append(query)
+            self.status_var.set(f"⏳ Engine loading... {len(self.pending_queries)} question(s) queued")
+            return
         self.status_var.set("⏳ Thinking...")
 
         thread = threading.Thread(target=self.process_response, args=(query,), daemon=True)
         thread.start()
 
+    def run_example(self):
+        """Run the last answered topic's example in the tutor sandbox"""
+        if self.loading:
+            self.update_chat("error", "Tutor is still loading, try again in a moment")
+            return
+        if not self.tutor or not hasattr(self.tutor, "run_example"):
+            self.update_chat("error", "Tutor not loaded")
+            return
+        self.status_var.set("⏳ Running example...")
+        thread = threading.Thread(target=self.process_example, daemon=True)
+        thread.start()
+
+    def process_example(self):
+        try:
+            response = self.tutor.run_example()
+            self.warm_response(response)
+            self.response_queue.put(("tutor", response))
+        except Exception as e:
+            self.response_queue.put(("error", str(e)))
+
     def process_response(self, query):
         try:
             if not self.tutor:
                 self.response_queue.put(("error", "Tutor not loaded"))
                 return
-            response = self.tutor.generate_response(query)
+            # answer() goes through admission control when the tutor has it enabled
+            if hasattr(self.tutor, "answer"):
+                response = self.tutor.answer(query, session="gui")
+            else:
+                response = self.tutor.generate_response(query)
+            self.warm_response(response)
             self.response_queue.put(("tutor", response))
         except Exception as e:
             self.response_queue.put(("error", str(e)))
 
+    def warm_response(self, response):
+        """Tokenize the response's code blocks here, off the Tk thread"""
+        try:
+            from highlight import warm
+            warm(response)
+        except Exception:
+            pass
+
     def update_chat(self, sender, message, autoscroll=True):
         self.chat_text.config(state=tk.NORMAL)
         timestamp = time.strftime("%H:%M:%S")
@@ -187,21 +383,43 @@ class TutorGUI:
         """Format tutor output with code highlighting"""
         response = re.sub(r"\x1b\[[0-9;]*m", "", response)
         lines, formatted = response.split("\n"), []
-        code_mode = False
+        code_mode, code_lines = False, []
         for line in lines:
             if line.strip().startswith("```python"):
                 code_mode = True
                 self.chat_text.insert(tk.END, "\n╔════════ CODE ════════\n", "code")
             elif line.strip() == "```":
                 code_mode = False
+                self.insert_code_block(code_lines)
+                code_lines = []
                 self.chat_text.insert(tk.END, "╚═══════════════════════\n", "code")
             else:
                 if code_mode:
-                    self.chat_text.insert(tk.END, f"    {line}\n", "code")
+                    code_lines.append(line)
                 else:
                     formatted.append(line)
+        if code_lines:
+            self.insert_code_block(code_lines)
         return "\n".join(formatted)
 
+    def insert_code_block(self, code_lines):
+        """Insert a code block in one go and color it with one tag_add per token type"""
+        first_line = int(self.chat_text.index("end-1c").split(".")[0])
+        self.chat_text.insert(tk.END, "".join(f"    {line}\n" for line in code_lines), "code")
+        try:
+            from highlight import python_spans
+            spans = python_spans("\n".join(code_lines) + "\n")
+        except Exception:
+            return
+        offset = first_line - 1
+        for tag, ranges in spans.items():
+            indexes = []
+            for start_line, start_col, end_line, end_col in ranges:
+                indexes.append(f"{start_line + offset}.{start_col + 4}")
+                indexes.append(f"{end_line + offset}.{end_col + 4}")
+            if indexes:
+                self.chat_text.tag_add(tag, *indexes)
+
     def on_example_selected(self, event):
         example = self.example_var.get()
         self.input_var.set(example)
@@ -211,17 +429,30 @@ class TutorGUI:
         try:
             while True:
                 sender, content = self.response_queue.get_nowait()
+                if sender == "status":
+                    self.status_var.set(content)
+                    continue
+                if sender == "loaded":
+                    self.on_framework_loaded()
+                    continue
+                if sender == "suggestions":
+                    self.show_suggestions(*content)
+                    continue
                 # Tutor responses still autoscroll
                 self.update_chat(sender, content, autoscroll=True)
-                self.status_var.set("✅ Ready")
+                if not self.loading:
+                    self.status_var.set("✅ Ready")
         except queue.Empty:
             pass
         self.root.after(100, self.check_queue)
 
 
 def main():
+    framework_path = None
+    if "--framework" in sys.argv[1:-1]:
+        framework_path = sys.argv[sys.argv.index("--framework") + 1]
     root = tk.Tk()
-    app = TutorGUI(root)
+    app = TutorGUI(root, framework_path)
     root.after(100, app.check_queue)
     root.mainloop()
 
@@ -0,0 +1,85 @@
+# highlight.py
+"""
+Python syntax highlighting spans for the GUI's chat view
+Spans are computed with `tokenize` once per snippet and cached by the
+snippet's hash, grouped by tag, so the GUI applies each tag to all of its
+ranges with a single tag_add call. warm() is meant to run off the Tk thread
+(response worker, engine loading) so the Tk thread only reads the cache.
+"""
+
+import builtins
+import collections
+import hashlib
+import io
+import keyword
+import re
+import threading
+import tokenize
+
+CACHE_SIZE = 256
+
+_BUILTINS = frozenset(dir(builtins))
+_FENCE_RE = re.compile(r"```python\n(.*?)```", re.DOTALL)
+
+_cache = collections.OrderedDict()
+_lock = threading.Lock()
+
+
+def _key(code: str) -> str:
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+
+def _compute(code: str) -> dict:
+    """{tag: [(start_line, start_col, end_line, end_col), ...]}, lines 1-based"""
+    spans = collections.defaultdict(list)
+    previous = None
+    try:
+        for tok in tokenize.generate_tokens(io.StringIO(code).readline):
+            span = tok.start + tok.end
+            if tok.type == tokenize.STRING:
+                spans["py_string"].append(span)
+            elif tok.type == tokenize.COMMENT:
+                spans["py_comment"].append(span)
+            elif tok.type == tokenize.NUMBER:
+                spans["py_number"].append(span)
+            elif tok.type == tokenize.NAME:
+                if previous in ("def", "class"):
+                    spans["py_defname"].append(span)
+                elif keyword.iskeyword(tok.string):
+                    spans["py_keyword"].append(span)
+                elif tok.string in _BUILTINS:
+                    spans["py_builtin"].append(span)
+            elif tok.type == tokenize.OP and tok.string == "@":
+                spans["py_decorator"].append(span)
+            if tok.type not in (tokenize.NL, tokenize.COMMENT):
+                previous = tok.string
+    except (tokenize.TokenError, SyntaxError):
+        pass  # keep what was highlighted before the broken part
+    return dict(spans)
+
+
+def python_spans(code: str) -> dict:
+    """Cached highlighting spans for one snippet"""
+    key = _key(code)
+    with _lock:
+        spans = _cache.get(key)
+        if spans is not None:
+            _cache.move_to_end(key)
+            return spans
+    spans = _compute(code)
+    with _lock:
+        _cache[key] = spans
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return spans
+
+
+def code_blocks(text: str) -> list:
+    """Bodies of the ```python blocks in a response"""
+    return _FENCE_RE.findall(re.sub(r"\x1b\[[0-9;]*m", "", text))
+
+
+def warm(text: str) -> None:
+    """Compute (and cache) spans for every code block in a response"""
+    for code in code_blocks(text):
+        python_spans(code)
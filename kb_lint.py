@@ -0,0 +1,201 @@
+# kb_lint.py
+"""
+Build-time checker for knowledge_base.py
+ - every topic has patterns / code / explanation of the right type
+ - every pattern compiles
+ - every pattern is benchmarked against adversarial long inputs with the engine
+   the tutor runs it on (matcher.compile_pattern; `--engine re` benchmarks plain
+   `re` instead); stacked `.*` patterns (cubic or worse) and anything over the
+   time budget fail the build, quadratic patterns are reported per topic
+ - patterns that can never win because an earlier topic matches first
+   (shadowing) or that are implied by another pattern of the same topic
+ - every code block parses as Python
+
+Usage:
+    python kb_lint.py [--size 8000] [--budget-ms 100] [--engine runtime|re] [--strict]
+Exits with status 1 on errors (or on warnings with --strict).
+"""
+
+import argparse
+import ast
+import math
+import re
+import sys
+import time
+
+from matcher import compile_pattern
+from sections import strip_fences
+
+_LITERAL_RE = re.compile(r"[a-z0-9]+(?: [a-z0-9]+)*")
+
+
+class LintReport:
+    """Collected errors and warnings"""
+
+    def __init__(self):
+        self.errors = []
+        self.warnings = []
+
+    def error(self, topic: str, message: str) -> None:
+        self.errors.append(f"{topic}: {message}")
+
+    def warn(self, topic: str, message: str) -> None:
+        self.warnings.append(f"{topic}: {message}")
+
+
+def pattern_pieces(pattern: str) -> list:
+    """Literal words of a pattern in order ('find.*max' -> ['find', 'max'])"""
+    return _LITERAL_RE.findall(pattern)
+
+
+def sample_query(pattern: str) -> str:
+    """Shortest natural query the pattern is meant to catch"""
+    return " ".join(pattern_pieces(pattern))
+
+
+def adversarial_inputs(pattern: str, size: int) -> list:
+    """
+    Long inputs that make a backtracking engine work hardest: every literal
+    except the last one repeated over and over, so no match is ever found
+    """
+    pieces = pattern_pieces(pattern) or ["a"]
+    prefix = " ".join(pieces[:-1]) or pieces[0][:-1] or "a"
+    inputs = [
+        ((prefix + " ") * (size // (len(prefix) + 1) + 1))[:size],
+        ("a" * size),
+        ((pieces[0] + " ") * (size // (len(pieces[0]) + 1) + 1))[:size],
+    ]
+    return inputs
+
+
+def time_search(regex, inputs: list, repeat: int = 3) -> float:
+    """Best-of-N seconds to run the regex over all inputs"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for text in inputs:
+            regex.search(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def benchmark_pattern(regex, size: int, engine: str = "runtime") -> tuple:
+    """
+    Return (seconds at full size, growth exponent between size/4 and size)
+    An exponent near 1 is linear, near 2 quadratic, near 3 cubic.
+    """
+    matcher = compile_pattern(regex.pattern) if engine == "runtime" else regex
+    small = time_search(matcher, adversarial_inputs(regex.pattern, size // 4))
+    large = time_search(matcher, adversarial_inputs(regex.pattern, size))
+    if small <= 0 or large <= 0:
+        return large, 1.0
+    return large, math.log(large / small) / math.log(4)
+
+
+def first_match(compiled: list, query: str):
+    """Topic the tutor would pick for a query (same order as find_best_match)"""
+    text = query.lower()
+    for topic, regexes in compiled:
+        for regex in regexes:
+            if regex.search(text):
+                return topic, regex.pattern
+    return None, None
+
+
+def lint(knowledge_base: dict, size: int = 8000, budget_ms: float = 100.0,
+         max_exponent: float = 2.5, noise_ms: float = 1.0, engine: str = "runtime") -> LintReport:
+    report = LintReport()
+    compiled = []
+
+    for topic, data in knowledge_base.items():
+        if not isinstance(data, dict):
+            report.error(topic, "topic must be a dict")
+            continue
+        for key, kind in (("patterns", list), ("code", str), ("explanation", str)):
+            if not isinstance(data.get(key), kind):
+                report.error(topic, f"'{key}' missing or not a {kind.__name__}")
+        patterns = data.get("patterns") or []
+        if not patterns:
+            report.error(topic, "no patterns")
+
+        regexes = []
+        for pattern in patterns:
+            try:
+                regexes.append(re.compile(pattern))
+            except re.error as e:
+                report.error(topic, f"pattern {pattern!r} does not compile: {e}")
+        compiled.append((topic, regexes))
+
+        if isinstance(data.get("code"), str):
+            try:
+                ast.parse(strip_fences(data["code"]))
+            except SyntaxError as e:
+                report.error(topic, f"code block does not parse: line {e.lineno}: {e.msg}")
+
+    # Regex performance on adversarial input
+    for topic, regexes in compiled:
+        quadratic = []
+        for regex in regexes:
+            seconds, exponent = benchmark_pattern(regex, size, engine)
+            ms = seconds * 1000
+            if ms <= noise_ms:
+                continue
+            if exponent > max_exponent or ms > budget_ms:
+                report.error(topic, f"pattern {regex.pattern!r} is super-linear "
+                                    f"(~n^{exponent:.1f}, {ms:.1f} ms at {size} chars)")
+            elif exponent > 1.5:
+                quadratic.append((ms, regex.pattern))
+        if quadratic:
+            ms, pattern = max(quadratic)
+            report.warn(topic, f"{len(quadratic)} pattern(s) grow ~n^2 on adversarial input "
+                               f"(worst {pattern!r}, {ms:.1f} ms at {size} chars)")
+
+    # Shadowing across topics and redundancy within a topic
+    order = {topic: i for i, (topic, _) in enumerate(compiled)}
+    for topic, regexes in compiled:
+        shadowed = 0
+        for regex in regexes:
+            sample = sample_query(regex.pattern)
+            if not sample:
+                continue
+            winner, winning_pattern = first_match(compiled, sample)
+            if winner is not None and order[winner] < order[topic]:
+                shadowed += 1
+                report.warn(topic, f"pattern {regex.pattern!r} is shadowed by "
+                                   f"{winner} ({winning_pattern!r}) for query {sample!r}")
+            for other in regexes:
+                if other is not regex and other.search(sample) and not regex.search(sample_query(other.pattern)):
+                    report.warn(topic, f"pattern {regex.pattern!r} is redundant: "
+                                       f"{other.pattern!r} already matches everything it does")
+                    break
+        if regexes and shadowed == len(regexes):
+            report.error(topic, "every pattern is shadowed by an earlier topic; topic is unreachable")
+
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Validate knowledge_base.py")
+    parser.add_argument("--size", type=int, default=8000, help="adversarial input length in characters")
+    parser.add_argument("--budget-ms", type=float, default=100.0, help="max search time per pattern at --size")
+    parser.add_argument("--engine", choices=("runtime", "re"), default="runtime",
+                        help="benchmark the tutor's matcher or plain re")
+    parser.add_argument("--strict", action="store_true", help="treat warnings as errors")
+    args = parser.parse_args(argv)
+
+    from knowledge_base import knowledge_base
+    report = lint(knowledge_base, size=args.size, budget_ms=args.budget_ms, engine=args.engine)
+
+    for message in report.warnings:
+        print(f"WARNING {message}")
+    for message in report.errors:
+        print(f"ERROR   {message}")
+    print(f"{len(knowledge_base)} topics checked: "
+          f"{len(report.errors)} error(s), {len(report.warnings)} warning(s)")
+
+    failed = report.errors or (args.strict and report.warnings)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
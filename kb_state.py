@@ -0,0 +1,142 @@
+# kb_state.py
+"""
+Prepared knowledge base state for CompleteGPTOSSTutor
+A KnowledgeSnapshot bundles everything the request path needs - the topic
+records with their compiled matchers (topics.TopicTable), section index and
+pre-rendered responses - so the
+tutor can swap a whole new snapshot in with one attribute assignment while
+in-flight queries keep using the one they started with.
+"""
+
+import collections
+import hashlib
+import importlib.util
+import itertools
+import os
+import threading
+from collections.abc import Mapping
+
+from sections import PackedSection, SectionIndex, parse_sections
+from topics import TopicTable, load_topics
+
+_module_counter = itertools.count()
+
+
+class KnowledgeSnapshot:
+    """Immutable-by-convention view of one knowledge base version"""
+
+    def __init__(self, topics: TopicTable, section_index: SectionIndex, rendered: dict):
+        self.topics = topics
+        self.section_index = section_index
+        self.rendered = rendered
+        self.version = hashlib.sha256("".join(
+            f"{topic.name}:{topic.digest};" for topic in topics.records
+        ).encode("utf-8")).hexdigest()[:16]
+
+    @property
+    def knowledge_base(self) -> TopicTable:
+        """Topic name -> {"patterns", "code", "explanation"}, as in knowledge_base.py"""
+        return self.topics
+
+    @property
+    def digests(self) -> dict:
+        return {topic.name: topic.digest for topic in self.topics.records}
+
+    @property
+    def matchers(self) -> list:
+        return [(topic.name, topic.matchers) for topic in self.topics.records]
+
+
+class LazyRendered(Mapping):
+    """
+    Topic name -> rendered response, rendered on first use and kept in a small LRU
+    `render` is not pickled (it is usually a method of the tutor class, which may
+    have been loaded under another module name); set it again after unpickling.
+    """
+
+    def __init__(self, topics, render, cache_size: int = 64):
+        self.topics = topics
+        self.render = render
+        self.cache_size = cache_size
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name: str) -> str:
+        with self._lock:
+            text = self._cache.get(name)
+            if text is not None:
+                self._cache.move_to_end(name)
+                return text
+        text = self.render(self.topics[name])
+        with self._lock:
+            self._cache[name] = text
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return text
+
+    def __iter__(self):
+        return iter(self.topics)
+
+    def __len__(self) -> int:
+        return len(self.topics)
+
+    def __getstate__(self):
+        return {"topics": self.topics, "cache_size": self.cache_size}
+
+    def __setstate__(self, state):
+        self.__init__(state["topics"], None, state["cache_size"])
+
+
+def build_snapshot(knowledge_base: dict, render, previous: KnowledgeSnapshot = None) -> KnowledgeSnapshot:
+    """
+    Prepare a snapshot, reusing the compiled matchers, sections and rendered
+    text of every topic whose content is unchanged since `previous`.
+    `render(data)` turns a topic dict into its pre-rendered response text.
+    """
+    topics = load_topics(knowledge_base, previous.topics if previous else None)
+    old_digests = previous.digests if previous else {}
+    # Packed tables keep text compressed; render on demand instead of up front
+    rendered = LazyRendered(topics, render) if topics.lazy else {}
+    section_index = SectionIndex({})
+
+    for topic in topics.records:
+        name = topic.name
+        if old_digests.get(name) == topic.digest:
+            parsed = previous.section_index.sections.get(name, [])
+            if not topics.lazy:
+                rendered[name] = previous.rendered[name]
+        else:
+            parsed = parse_sections(name, topics.code(topic))
+            if not topics.lazy:
+                rendered[name] = render(topics.as_dict(topic))
+        if topics.lazy:
+            # Keep only section names; their text stays compressed in the pack
+            parsed = [PackedSection(section, topics) for section in parsed]
+        section_index.add_topic(name, None, parsed)
+
+    return KnowledgeSnapshot(topics, section_index, rendered)
+
+
+def changed_topics(old: KnowledgeSnapshot, new: KnowledgeSnapshot) -> list:
+    """Topics added, removed or edited between two snapshots"""
+    topics = set(old.digests) | set(new.digests)
+    return sorted(t for t in topics if old.digests.get(t) != new.digests.get(t))
+
+
+def load_knowledge_base_file(path: str) -> dict:
+    """
+    Execute a knowledge_base.py file and return its `knowledge_base` dict.
+    Loaded under a private module name so the imported module is untouched.
+    """
+    name = f"_knowledge_base_reload_{next(_module_counter)}"
+    spec = importlib.util.spec_from_file_location(name, os.path.abspath(path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    knowledge_base = getattr(module, "knowledge_base", None)
+    if not isinstance(knowledge_base, dict):
+        raise ValueError(f"{path} does not define a knowledge_base dict")
+    for topic, data in knowledge_base.items():
+        missing = {"patterns", "code", "explanation"} - set(data)
+        if missing:
+            raise ValueError(f"topic '{topic}' is missing {', '.join(sorted(missing))}")
+    return knowledge_base
@@ -0,0 +1,99 @@
+# kb_watch.py
+"""
+Hot reload for CompleteGPTOSSTutor
+Polls the knowledge base source file(s) - knowledge_base.py or a snippet
+pack built by snippet_store.py - in a background thread. When one changes,
+the new knowledge base is loaded and prepared off the request path (only
+changed topics are recompiled) and swapped into the tutor atomically.
+A file that fails to load (e.g. saved half-way through an edit) is reported
+and the current snapshot stays in service.
+"""
+
+import os
+import threading
+import time
+
+from colorama import Fore, Style
+
+from kb_state import changed_topics, load_knowledge_base_file
+
+
+def _stat(path: str):
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+
+def load_source(paths: list):
+    """knowledge_base.py, or a compressed snippet pack (told apart by its header, not its name)"""
+    from snippet_store import is_snippet_pack, load_snippet_pack
+    if is_snippet_pack(paths[0]):
+        return load_snippet_pack(paths[0])
+    return load_knowledge_base_file(paths[0])
+
+
+class KnowledgeBaseWatcher:
+    """Background thread that rebuilds and swaps the tutor's snapshot on change"""
+
+    def __init__(self, tutor, paths: list = None, loader=None, interval: float = 1.0,
+                 settle: float = 0.2):
+        if not paths:
+            import knowledge_base as kb_module
+            paths = [kb_module.__file__]
+
+        self.tutor = tutor
+        self.paths = [os.path.abspath(p) for p in paths]
+        # loader(paths) -> knowledge_base dict (or a snippet pack)
+        self.loader = loader or load_source
+        self.interval = interval
+        self.settle = settle
+        self.reloads = 0
+        self._stats = {p: _stat(p) for p in self.paths}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="kb-watcher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _changed(self) -> bool:
+        changed = False
+        for path in self.paths:
+            current = _stat(path)
+            if current != self._stats.get(path):
+                self._stats[path] = current
+                changed = True
+        return changed
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            if not self._changed():
+                continue
+            # Let the editor finish writing before reading the file
+            time.sleep(self.settle)
+            self._changed()
+            self.reload()
+
+    def reload(self) -> bool:
+        """Load, prepare and swap in the current file contents"""
+        try:
+            knowledge_base = self.loader(self.paths)
+            old = self.tutor.snapshot
+            new = self.tutor.prepare_snapshot(knowledge_base, previous=old)
+        except Exception as e:
+            print(Fore.RED + f"[WARNING] Knowledge base reload failed, keeping current version: {e}" + Style.RESET_ALL)
+            return False
+
+        topics = changed_topics(old, new)
+        if not topics:
+            return False
+        self.tutor.swap_snapshot(new, self.paths)
+        self.reloads += 1
+        print(Fore.GREEN + f"[SUCCESS] Knowledge base reloaded ({len(topics)} topic(s) changed: "
+              f"{', '.join(topics)})" + Style.RESET_ALL)
+        return True
@@ -225,7 +225,7 @@ And this is the last line.\"\"\"
                     r"max.*number", r"maximum.*number", r"find.*max", r"largest.*number",
                     r"min.*number", r"minimum.*number", r"find.*min", r"smallest.*number",
                     r"average.*number", r"mean.*number", r"math.*function", r"calculate.*number",
-                    r"python.*function.*maximum", r"function.*find.*max",  # ADD THESE
+                    r"function.*maximum",
                 ],
                 "code": """```python
 def find_max(a: float, b: float, c: float) -> float:
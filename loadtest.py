@@ -0,0 +1,281 @@
+# loadtest.py
+"""
+Classroom load test for CompleteGPTOSSTutor
+Simulates concurrent student sessions against one in-process tutor and
+reports how many students a host can serve:
+ - each session is a thread issuing a realistic mix: the GUI's quick
+   examples, paraphrases of them, questions the tutor has no topic for, and
+   long code/error pastes
+ - sessions ramp up (1, 2, 4, ... up to --sessions) with no think time, so
+   every step measures throughput and p50/p95/p99 latency at that
+   concurrency; CPU and memory are sampled once a second throughout
+ - capacity = the best throughput whose p95 stays within --slo-ms, times
+   the interval between one student's questions (--question-interval)
+A stub tokenizer (regex word pieces) stands in for the GPT-OSS tokenizer,
+so it runs on a laptop without the model files. The tutor is built without
+warm start and with the optional features that environment variables turn on
+(shared cache, query log, generation, admission) cleared. With --admission the
+sessions go through the admission layer (tutor.answer) instead of calling
+generate_response directly.
+
+Usage:
+    python loadtest.py [--sessions 16] [--step-seconds 5] [--slo-ms 200]
+                       [--question-interval 30] [--admission] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_PIECE_RE = re.compile(r"\w{1,4}|[^\w\s]")
+# Tutor features switched on by the environment; a load test measures the bare tutor
+FEATURE_VARIABLES = ("TUTOR_SHARED_CACHE", "TUTOR_QUERY_LOG", "TUTOR_GENERATION", "TUTOR_ADMISSION")
+
+PARAPHRASES = [
+    "how do i {q}",
+    "can you show me how to {q} in python",
+    "{q} please",
+    "example: {q}?",
+    "i need to {q} for my homework",
+]
+
+MISSES = [
+    "what is a decorator",
+    "sort a linked list",
+    "explain big o notation",
+    "how do generators work",
+    "difference between list and tuple",
+    "build a rest api with flask",
+    "what does the yield keyword do",
+    "how do i install numpy",
+]
+
+
+class StubTokenizer:
+    """Deterministic stand-in with roughly the cost and counts of a BPE tokenizer"""
+
+    def encode(self, text: str, add_special_tokens: bool = True) -> list:
+        return _PIECE_RE.findall(text)
+
+
+def quick_examples() -> list:
+    try:
+        from gui import QUICK_EXAMPLES
+        return list(QUICK_EXAMPLES)
+    except ImportError:  # no Tk on this machine; fall back to pattern phrases
+        from kb_lint import sample_query
+        from knowledge_base import knowledge_base
+        return [sample_query(data["patterns"][0]) for data in knowledge_base.values()]
+
+
+def long_paste(rng: random.Random, examples: list) -> str:
+    """A pasted script plus traceback, 5-50 KB, with a question at the end"""
+    lines = []
+    for i in range(rng.randint(100, 1000)):
+        lines.append(f"    result_{i} = compute_value(data[{i}], factor={rng.random():.3f})  # step {i}")
+    lines.append('Traceback (most recent call last):\n  File "main.py", line 12, in <module>')
+    lines.append("ValueError: something went wrong")
+    lines.append(rng.choice(examples + MISSES))
+    return "\n".join(lines)
+
+
+def query_mix(rng: random.Random, examples: list):
+    """Endless stream of (kind, query): 40% examples, 30% paraphrases, 20% misses, 10% pastes"""
+    while True:
+        roll = rng.random()
+        if roll < 0.4:
+            yield "example", rng.choice(examples)
+        elif roll < 0.7:
+            yield "paraphrase", rng.choice(PARAPHRASES).format(q=rng.choice(examples).lower())
+        elif roll < 0.9:
+            yield "miss", rng.choice(MISSES)
+        else:
+            yield "paste", long_paste(rng, examples)
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def rss_mb() -> float:
+    """Current resident memory of this process"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, AttributeError):
+        if resource is not None:
+            # Peak, not current, where /proc is unavailable (kB on Linux, bytes on macOS)
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+        return 0.0
+
+
+class Sampler:
+    """Once-a-second CPU% (of one core) and RSS samples while a test runs"""
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self.samples = []
+        self._counters = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="loadtest-sampler", daemon=True)
+
+    def counter(self) -> list:
+        """A one-item list a single session increments; summed into `completed`"""
+        counter = [0]
+        with self._lock:
+            self._counters.append(counter)
+        return counter
+
+    @property
+    def completed(self) -> int:
+        with self._lock:
+            return sum(counter[0] for counter in self._counters)
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        last_wall, last_cpu, last_done = time.perf_counter(), time.process_time(), 0
+        while not self._stop.wait(self.interval):
+            wall, cpu, done = time.perf_counter(), time.process_time(), self.completed
+            self.samples.append({
+                "t": round(wall - self._started, 1),
+                "qps": round((done - last_done) / (wall - last_wall), 1),
+                "cpu_pct": round(100.0 * (cpu - last_cpu) / (wall - last_wall), 1),
+                "rss_mb": round(rss_mb(), 1),
+            })
+            last_wall, last_cpu, last_done = wall, cpu, done
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def run_step(tutor, sessions: int, seconds: float, examples: list, sampler: Sampler,
+             use_admission: bool = False, seed: int = 0) -> dict:
+    """Closed loop: `sessions` threads ask back to back for `seconds`"""
+    deadline = time.perf_counter() + seconds
+    latencies, kinds, lock = [], {}, threading.Lock()
+
+    def session(index: int) -> None:
+        rng = random.Random(seed * 1000 + index)
+        mix = query_mix(rng, examples)
+        # Per-session count: a shared `+= 1` from many threads loses increments
+        done = sampler.counter()
+        local = []
+        while time.perf_counter() < deadline:
+            kind, query = next(mix)
+            started = time.perf_counter()
+            if use_admission:
+                tutor.answer(query, session=f"student-{index}")
+            else:
+                tutor.generate_response(query)
+            local.append((kind, (time.perf_counter() - started) * 1000))
+            done[0] += 1
+        with lock:
+            for kind, ms in local:
+                latencies.append(ms)
+                kinds[kind] = kinds.get(kind, 0) + 1
+
+    threads = [threading.Thread(target=session, args=(i,), daemon=True) for i in range(sessions)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "sessions": sessions,
+        "queries": len(latencies),
+        "qps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mix": kinds,
+    }
+
+
+def ramp(max_sessions: int) -> list:
+    steps, n = [], 1
+    while n < max_sessions:
+        steps.append(n)
+        n *= 2
+    return steps + [max_sessions]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Simulate a classroom of concurrent tutor sessions")
+    parser.add_argument("--sessions", type=int, default=16, help="highest number of concurrent sessions")
+    parser.add_argument("--step-seconds", type=float, default=5.0, help="duration of each ramp step")
+    parser.add_argument("--slo-ms", type=float, default=200.0, help="p95 latency a step must stay within")
+    parser.add_argument("--question-interval", type=float, default=30.0,
+                        help="seconds between one student's questions, for the capacity estimate")
+    parser.add_argument("--admission", action="store_true", help="go through admission control (tutor.answer)")
+    parser.add_argument("--json", help="also write the full results here")
+    args = parser.parse_args(argv)
+
+    for name in FEATURE_VARIABLES:
+        os.environ.pop(name, None)
+    from tutor import CompleteGPTOSSTutor
+
+    tutor = CompleteGPTOSSTutor(warm_start=False)
+    # Let the background tokenizer load finish now so it doesn't compete with the first step
+    tutor._tokenizer_thread.join()
+    tutor.tokenizer = StubTokenizer()
+    if args.admission:
+        # Simulated students ask back to back; only the queue and priorities are under test
+        tutor.enable_admission(rate=1e9, burst=1e9)
+    examples = quick_examples()
+
+    sampler = Sampler().start()
+    steps = []
+    for seed, sessions in enumerate(ramp(args.sessions)):
+        result = run_step(tutor, sessions, args.step_seconds, examples, sampler, args.admission, seed)
+        steps.append(result)
+        print(f"{sessions:>4} sessions: {result['qps']:>8.1f} q/s   p50 {result['p50_ms']:>7.2f} ms   "
+              f"p95 {result['p95_ms']:>7.2f} ms   p99 {result['p99_ms']:>7.2f} ms")
+    sampler.stop()
+
+    print("\n   t(s)     q/s    cpu%   rss MB")
+    for sample in sampler.samples:
+        print(f"{sample['t']:>7} {sample['qps']:>7} {sample['cpu_pct']:>7} {sample['rss_mb']:>8}")
+
+    within = [s for s in steps if s["p95_ms"] <= args.slo_ms]
+    best = max(within, key=lambda s: s["qps"]) if within else None
+    capacity = int(best["qps"] * args.question_interval) if best else 0
+    print()
+    if best:
+        print(f"Capacity: ~{capacity} students per tutor process ({best['qps']} q/s with p95 "
+              f"{best['p95_ms']} ms <= {args.slo_ms:.0f} ms, one question per student every "
+              f"{args.question_interval:.0f} s)")
+    else:
+        print(f"Capacity: no step kept p95 within {args.slo_ms:.0f} ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"steps": steps, "samples": sampler.samples, "capacity_students": capacity,
+                       "slo_ms": args.slo_ms, "question_interval": args.question_interval}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+# matcher.py
+"""
+Bounded-latency query matching for CompleteGPTOSSTutor
+ - match_window() caps the text used for matching to the head and tail of very
+   long pastes (the question is almost always at the start or the end)
+ - compile_pattern() turns knowledge base patterns of the form `word.*word...`
+   into a keyword chain matched with str.find, which is linear in the input
+   instead of the quadratic/cubic backtracking `re` does on `.*`; other patterns
+   use RE2 when the `re2` module is installed and fall back to `re`
+ - count_tokens() runs the tokenizer over whitespace-aligned chunks and stops
+   counting exactly after a character cap, extrapolating the rest
+"""
+
+import re
+import sys
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+MAX_MATCH_CHARS = 2000
+TOKEN_CHUNK_CHARS = 4096
+MAX_TOKEN_CHARS = 100000
+
+_LITERAL_PIECE_RE = re.compile(r"[\w ]*")
+
+
+def match_window(text: str, limit: int = MAX_MATCH_CHARS) -> str:
+    """
+    Head and tail of the text, at most `limit` characters in total.
+    The two halves are joined with a newline so no pattern (`.` never matches
+    a newline) can match across the cut.
+    """
+    if limit is None or len(text) <= limit:
+        return text
+    half = limit // 2
+    return text[:half] + "\n" + text[-half:]
+
+
+class KeywordChain:
+    """
+    Linear-time equivalent of `re.search` for patterns like 'find.*max':
+    every keyword must appear, in order, on the same line.
+    """
+
+    engine = "chain"
+    # One of these per pattern per topic; keep them small
+    __slots__ = ("pattern", "keywords")
+
+    def __init__(self, pattern: str, keywords):
+        self.pattern = pattern
+        self.keywords = tuple(sys.intern(k) for k in keywords)
+
+    def search(self, text: str) -> bool:
+        keywords = self.keywords
+        for line in text.split("\n"):
+            pos = 0
+            for keyword in keywords:
+                pos = line.find(keyword, pos)
+                if pos < 0:
+                    break
+                pos += len(keyword)
+            else:
+                return True
+        return False
+
+
+class RegexMatcher:
+    """Anything that isn't a keyword chain: RE2 if available, else `re`"""
+
+    __slots__ = ("pattern", "engine", "_regex")
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self.engine = "re"
+        self._regex = None
+        if re2 is not None:
+            try:
+                self._regex = re2.compile(pattern)
+                self.engine = "re2"
+            except Exception:
+                self._regex = None
+        if self._regex is None:
+            self._regex = re.compile(pattern)
+
+    def search(self, text: str) -> bool:
+        return self._regex.search(text) is not None
+
+    def __getstate__(self):
+        # Compiled RE2 objects don't pickle; recompile from the pattern instead
+        return {"pattern": self.pattern}
+
+    def __setstate__(self, state):
+        self.__init__(state["pattern"])
+
+
+def compile_pattern(pattern: str):
+    """Fastest matcher with the same answers as re.search(pattern, text)"""
+    pieces = pattern.split(".*")
+    if all(_LITERAL_PIECE_RE.fullmatch(piece) for piece in pieces):
+        return KeywordChain(pattern, [piece for piece in pieces if piece])
+    return RegexMatcher(pattern)
+
+
+def _chunks(text: str, size: int):
+    """Split text into ~size-character chunks, cutting only at whitespace"""
+    start, length = 0, len(text)
+    while start < length:
+        end = min(start + size, length)
+        if end < length:
+            cut = text.rfind(" ", start, end)
+            if cut <= start:
+                cut = text.rfind("\n", start, end)
+            if cut > start:
+                end = cut
+        yield text[start:end]
+        start = end
+
+
+def count_tokens(tokenizer, text: str, chunk_chars: int = TOKEN_CHUNK_CHARS,
+                 max_chars: int = MAX_TOKEN_CHARS) -> int:
+    """
+    Token count of arbitrarily long text in bounded time and memory.
+    Short text is encoded in one call exactly as before; long text is encoded
+    chunk by chunk and, past `max_chars`, extrapolated from the counted part.
+    """
+    if len(text) <= chunk_chars:
+        return len(tokenizer.encode(text))
+
+    counted_chars, tokens = 0, 0
+    for chunk in _chunks(text, chunk_chars):
+        if counted_chars >= max_chars:
+            break
+        try:
+            tokens += len(tokenizer.encode(chunk, add_special_tokens=False))
+        except TypeError:
+            tokens += len(tokenizer.encode(chunk))
+        counted_chars += len(chunk)
+
+    if counted_chars < len(text) and counted_chars:
+        tokens = round(tokens * len(text) / counted_chars)
+    return tokens
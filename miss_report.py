@@ -0,0 +1,284 @@
+# miss_report.py
+"""
+Topic suggestions from missed queries in the query log
+ 1. streams the log (and its rotated backups) once, keeping only missed
+    queries, deduplicated by normalized text with a count
+ 2. weights words and bigrams by TF-IDF over the distinct missed queries
+ 3. clusters them with online leader clustering: each query
+    joins the most similar centroid (cosine, candidates found through an
+    inverted index on each centroid's top terms; terms shared by more than
+    MAX_POSTING clusters are too common to narrow anything down and are
+    skipped, so each query is compared with a bounded number of clusters)
+    or starts a new cluster
+ 4. ranks clusters by how many logged queries they cover and, for each,
+    suggests a `word.*word` pattern and whether it belongs to an existing
+    topic or a new one, with the measured change in match rate over the log
+
+Usage:
+    python miss_report.py [queries.jsonl ...] [--top 20] [--threshold 0.5] [--json]
+Without paths the default log in the tutor cache directory is read.
+"""
+
+import argparse
+import collections
+import json
+import math
+import os
+import re
+import sys
+
+from matcher import compile_pattern
+from query_log import log_files
+from sections import name_words, parse_sections
+
+_WORD_RE = re.compile(r"[a-z][a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from get give how i in into is it me my
+of on or please python show some tell that the this to use using way what when
+where which with write you your code example function program make create
+""".split())
+
+CENTROID_TERMS = 25
+# Centroid terms a cluster is indexed under, and the most clusters a term may list
+INDEX_TERMS = 8
+MAX_POSTING = 50
+_EMPTY = frozenset()
+
+
+def query_terms(text: str) -> list:
+    """Content words of a query, in order"""
+    return [w for w in _WORD_RE.findall(text.lower()) if w not in STOPWORDS]
+
+
+def features(terms: list) -> collections.Counter:
+    """Unigrams plus adjacent bigrams"""
+    feats = collections.Counter(terms)
+    feats.update(f"{a} {b}" for a, b in zip(terms, terms[1:]))
+    return feats
+
+
+def read_log(paths: list):
+    """
+    Stream (total queries, Counter of missed query text, misses the local
+    generator answered) over log files. Lines without a miss are counted but
+    not parsed.
+    """
+    total, misses, generated = 0, collections.Counter(), 0
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                total += 1
+                if '"miss":true' not in line:
+                    continue
+                if '"generated":true' in line:
+                    generated += 1
+                try:
+                    text = json.loads(line).get("q")
+                except ValueError:
+                    continue
+                if text:
+                    misses[" ".join(text.lower().split())] += 1
+    return total, misses, generated
+
+
+class Cluster:
+    def __init__(self, cid: int):
+        self.id = cid
+        self.centroid = {}
+        self.norm = 1.0
+        # Heaviest centroid terms, the ones the candidate index lists it under
+        self.index_terms = []
+        self.weight = 0.0
+        self.count = 0
+        # word -> number of logged queries in the cluster containing it
+        self.coverage = collections.Counter()
+        self.examples = []
+
+    def add(self, vector: dict, terms: list, text: str, count: int) -> None:
+        total = self.weight + count
+        for term in set(self.centroid) | set(vector):
+            self.centroid[term] = (self.centroid.get(term, 0.0) * self.weight +
+                                   vector.get(term, 0.0) * count) / total
+        if len(self.centroid) > CENTROID_TERMS:
+            top = sorted(self.centroid.items(), key=lambda kv: -kv[1])[:CENTROID_TERMS]
+            self.centroid = dict(top)
+        # Computed once per add, not once per comparison
+        self.norm = math.sqrt(sum(v * v for v in self.centroid.values())) or 1.0
+        self.index_terms = sorted(self.centroid, key=self.centroid.get, reverse=True)[:INDEX_TERMS]
+        self.weight = total
+        self.count += count
+        for word in set(terms):
+            self.coverage[word] += count
+        self.examples.append((count, text))
+        if len(self.examples) > 20:
+            self.examples = sorted(self.examples, reverse=True)[:10]
+
+    def core_words(self, share: float = 0.5) -> list:
+        """Words found in at least `share` of the cluster's queries, most common first"""
+        return [w for w, n in self.coverage.most_common() if n >= share * self.count]
+
+
+def _normalize(vector: dict) -> dict:
+    norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+    return {k: v / norm for k, v in vector.items()}
+
+
+def _cosine(vector: dict, cluster: Cluster) -> float:
+    """Cosine of a normalized query vector and a cluster centroid"""
+    centroid = cluster.centroid
+    return sum(v * centroid.get(k, 0.0) for k, v in vector.items()) / cluster.norm
+
+
+def cluster_misses(misses: collections.Counter, threshold: float = 0.5) -> list:
+    """Online leader clustering of TF-IDF vectors, most frequent queries first"""
+    term_lists = {text: query_terms(text) for text in misses}
+    df = collections.Counter()
+    for terms in term_lists.values():
+        df.update(set(features(terms)))
+    n_docs = max(len(term_lists), 1)
+
+    clusters, index = [], collections.defaultdict(set)
+    for text, count in sorted(misses.items(), key=lambda kv: -kv[1]):
+        terms = term_lists[text]
+        if not terms:
+            continue
+        vector = _normalize({t: tf * math.log(1 + n_docs / df[t]) for t, tf in features(terms).items()})
+        candidates = set()
+        for term in vector:
+            posting = index.get(term, _EMPTY)
+            if len(posting) <= MAX_POSTING:
+                candidates |= posting
+        best, best_sim = None, threshold
+        for cid in candidates:
+            sim = _cosine(vector, clusters[cid])
+            if sim >= best_sim:
+                best, best_sim = clusters[cid], sim
+        if best is None:
+            best = Cluster(len(clusters))
+            clusters.append(best)
+        old_terms = best.index_terms
+        best.add(vector, terms, text, count)
+        # Move the cluster to its new top terms; only this cluster changed
+        for term in set(old_terms) - set(best.index_terms):
+            index[term].discard(best.id)
+        for term in best.index_terms:
+            index[term].add(best.id)
+    return sorted(clusters, key=lambda c: -c.count)
+
+
+def topic_vocabulary(knowledge_base: dict) -> dict:
+    """Words that describe each topic: its name, pattern literals and section names"""
+    vocab = {}
+    for topic, data in knowledge_base.items():
+        words = set(name_words(topic))
+        for pattern in data["patterns"]:
+            words.update(_WORD_RE.findall(pattern))
+        for section in parse_sections(topic, data["code"]):
+            words.update(section.words)
+        vocab[topic] = words - STOPWORDS
+    return vocab
+
+
+def suggest_pattern(cluster: Cluster) -> str:
+    """`word.*word` from the two words most of the cluster's queries share, in typed order"""
+    words = cluster.core_words()[:2] or [w for w, _ in cluster.coverage.most_common(1)]
+    if len(words) < 2:
+        return words[0] if words else ""
+    position = collections.defaultdict(list)
+    for _, text in cluster.examples:
+        terms = query_terms(text)
+        for word in words:
+            if word in terms:
+                position[word].append(terms.index(word) / max(len(terms), 1))
+    words.sort(key=lambda w: sum(position[w]) / len(position[w]) if position[w] else 0.5)
+    return ".*".join(words)
+
+
+def build_report(paths: list, knowledge_base: dict, top: int = 20, threshold: float = 0.5) -> dict:
+    total, misses, generated = read_log(paths)
+    missed_total = sum(misses.values())
+    clusters = cluster_misses(misses, threshold)
+    vocab = topic_vocabulary(knowledge_base)
+
+    suggestions, covered = [], set()
+    for cluster in clusters[:top]:
+        pattern = suggest_pattern(cluster)
+        if not pattern:
+            continue
+        matcher = compile_pattern(pattern)
+        caught = [text for text in misses if matcher.search(text)]
+        caught_count = sum(misses[t] for t in caught)
+        covered.update(caught)
+
+        # An existing topic already describes most of what the cluster is about
+        core = set(cluster.core_words()) or set(pattern.split(".*"))
+        scores = {topic: len(core & words) / len(core) for topic, words in vocab.items()}
+        best_topic = max(scores, key=scores.get) if scores else None
+        target = best_topic if best_topic and scores[best_topic] >= 0.5 else None
+        suggestions.append({
+            "cluster_queries": cluster.count,
+            "examples": [t for _, t in sorted(cluster.examples, reverse=True)[:3]],
+            "pattern": pattern,
+            "topic": target or "new:" + "_".join(pattern.split(".*")),
+            "existing_topic": target is not None,
+            "newly_matched": caught_count,
+            "match_rate_gain": caught_count / total if total else 0.0,
+        })
+
+    covered_count = sum(misses[t] for t in covered)
+    return {
+        "total_queries": total,
+        "missed_queries": missed_total,
+        "generated_answers": generated,
+        "distinct_misses": len(misses),
+        "clusters": len(clusters),
+        "match_rate": (total - missed_total) / total if total else 0.0,
+        "match_rate_with_suggestions": (total - missed_total + covered_count) / total if total else 0.0,
+        "suggestions": suggestions,
+    }
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"{report['total_queries']} logged queries, {report['missed_queries']} missed "
+        f"({report['distinct_misses']} distinct, {report['clusters']} clusters)",
+        f"Missed queries answered by the local generator: {report['generated_answers']}",
+        f"Match rate: {report['match_rate']:.1%} now, "
+        f"{report['match_rate_with_suggestions']:.1%} with all suggestions below",
+        "",
+    ]
+    for i, s in enumerate(report["suggestions"], 1):
+        where = s["topic"] if s["existing_topic"] else f"{s['topic']} (new topic)"
+        lines.append(f"{i:>2}. r\"{s['pattern']}\" -> {where}")
+        lines.append(f"    cluster of {s['cluster_queries']} queries; pattern matches "
+                     f"{s['newly_matched']} missed queries (+{s['match_rate_gain']:.2%} match rate)")
+        for example in s["examples"]:
+            lines.append(f"      e.g. {example[:100]}")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Suggest knowledge base patterns from missed queries")
+    parser.add_argument("logs", nargs="*", help="query log files (default: the tutor's log and backups)")
+    parser.add_argument("--top", type=int, default=20, help="number of clusters to report")
+    parser.add_argument("--threshold", type=float, default=0.5, help="cosine similarity to join a cluster")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    paths = args.logs
+    if not paths:
+        from warm_start import cache_dir
+        paths = log_files(os.path.join(cache_dir(), "logs", "queries.jsonl"))
+    if not paths:
+        print("No query logs found (enable them with TUTOR_QUERY_LOG=1).")
+        return 1
+
+    from knowledge_base import knowledge_base
+    report = build_report(paths, knowledge_base, args.top, args.threshold)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+# query_log.py
+"""
+Structured query log for CompleteGPTOSSTutor
+One JSON line per answered query:
+    {"ts": ..., "qh": <query hash>, "topic": ..., "tokens": ..., "ms": ..., "miss": ...}
+Missed queries also carry their (truncated) text under "q", because those are
+the ones we need to read to decide which topics to add, and "generated": true
+when the local generator (generation.py) answered them instead. "ms" is the
+time to build the whole response, generation included.
+
+log() only does a non-blocking queue put; a background writer thread drains
+the queue in batches, appends them with one write, and rotates the file by
+size (queries.jsonl -> queries.jsonl.1 -> ...). Several tutor processes may
+share one log: a lock file next to it lets only one of them rotate at a time,
+and the others reopen the new file when they notice. If the writer ever falls
+behind by `max_pending` records, or a write fails, records are dropped and
+counted rather than slowing down (or stopping) the request path.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+
+from response_cache import normalize_query
+
+MAX_BYTES = 10 * 1024 * 1024
+BACKUP_COUNT = 5
+BATCH_SIZE = 1000
+FLUSH_INTERVAL = 0.5
+MAX_PENDING = 100000
+MISS_TEXT_CHARS = 500
+# A rotation lock older than this was left by a process that died mid-rotation
+STALE_LOCK_SECONDS = 60
+
+_STOP = object()
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()[:16]
+
+
+class QueryLogger:
+    """Append-only JSONL query log written by a background thread"""
+
+    def __init__(self, path: str, max_bytes: int = MAX_BYTES, backup_count: int = BACKUP_COUNT,
+                 log_miss_text: bool = True, max_pending: int = MAX_PENDING):
+        self.path = os.path.abspath(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.log_miss_text = log_miss_text
+        self.dropped = 0
+        self.written = 0
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._run, name="query-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, query: str, topic, token_count: int, latency_ms: float, generated: bool = False) -> None:
+        """Record one answered query; never blocks"""
+        record = {
+            "ts": round(time.time(), 3),
+            "qh": query_hash(query),
+            "topic": topic,
+            "tokens": token_count,
+            "ms": round(latency_ms, 3),
+            "miss": topic is None,
+        }
+        if generated:
+            record["generated"] = True
+        if topic is None and self.log_miss_text:
+            record["q"] = query[:MISS_TEXT_CHARS]
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            try:
+                first = self._queue.get(timeout=FLUSH_INTERVAL)
+            except queue.Empty:
+                continue
+            batch, stop = [], first is _STOP
+            if not stop:
+                batch.append(first)
+            while len(batch) < BATCH_SIZE and not stop:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                else:
+                    batch.append(item)
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception:
+                    # Never let the writer die: later records would be lost silently
+                    self.dropped += len(batch)
+            if stop:
+                self._file.close()
+                return
+
+    def _write(self, batch: list) -> None:
+        data = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in batch)
+        try:
+            if self._file.closed:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(data)
+            self._file.flush()
+        except (OSError, ValueError):
+            self.dropped += len(batch)
+            return
+        self.written += len(batch)
+        try:
+            if self._file.tell() >= self.max_bytes:
+                self._rotate()
+        except (OSError, ValueError):
+            pass  # e.g. Windows refuses to rename a file another process has open; retried next batch
+
+    def _rotate(self) -> None:
+        lock = self.path + ".lock"
+        try:
+            os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            # Another process is rotating; clear a lock whose owner died
+            if time.time() - os.path.getmtime(lock) > STALE_LOCK_SECONDS:
+                os.remove(lock)
+            return
+        try:
+            try:
+                ours = os.path.samestat(os.fstat(self._file.fileno()), os.stat(self.path))
+            except FileNotFoundError:
+                ours = False
+            self._file.close()
+            # Not ours: another process rotated already, so just reopen the new file
+            if ours:
+                for i in range(self.backup_count - 1, 0, -1):
+                    src = f"{self.path}.{i}"
+                    if os.path.exists(src):
+                        os.replace(src, f"{self.path}.{i + 1}")
+                if self.backup_count > 0:
+                    os.replace(self.path, f"{self.path}.1")
+                else:
+                    os.remove(self.path)
+        finally:
+            try:
+                self._file = open(self.path, "a", encoding="utf-8")
+            finally:
+                os.remove(lock)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush everything queued and stop the writer"""
+        if self._thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                pass
+            self._thread.join(timeout)
+
+
+def log_files(path: str) -> list:
+    """A log and its rotated backups, oldest first"""
+    backups, i = [], 1
+    while os.path.exists(f"{path}.{i}"):
+        backups.append(f"{path}.{i}")
+        i += 1
+    files = list(reversed(backups))
+    if os.path.exists(path):
+        files.append(path)
+    return files
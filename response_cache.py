@@ -0,0 +1,125 @@
+# response_cache.py
+"""
+Shared on-disk response cache for CompleteGPTOSSTutor
+Maps a normalized query to the matched topic, section and token count in a
+SQLite database (WAL mode), so every tutor process on a lab server shares one
+cache and a repeated question costs a single indexed read.
+ - rows are keyed by a cache version (knowledge base version + settings that
+   affect answers), and rows of other versions are dropped on open / swap
+ - the table is bounded to `max_rows`; the least recently used rows go first
+ - each thread gets its own connection; WAL lets readers run alongside a writer
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from warm_start import cache_dir
+
+DEFAULT_MAX_ROWS = 50000
+# last_used is only refreshed when older than this, to keep hits read-only
+TOUCH_INTERVAL = 60.0
+EVICT_EVERY = 200
+
+_SPACE_RE = re.compile(r"\s+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    version     TEXT NOT NULL,
+    query_key   TEXT NOT NULL,
+    topic       TEXT,
+    section     TEXT,
+    token_count INTEGER NOT NULL,
+    last_used   REAL NOT NULL,
+    PRIMARY KEY (version, query_key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query"""
+    return _SPACE_RE.sub(" ", query).strip().lower()
+
+
+def query_key(query: str) -> str:
+    return hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+
+
+class SharedResponseCache:
+    """SQLite-backed query -> (topic, section, token_count) cache"""
+
+    def __init__(self, path: str = None, max_rows: int = DEFAULT_MAX_ROWS):
+        self.path = path or os.path.join(cache_dir(), "responses.sqlite3")
+        self.max_rows = max_rows
+        self._local = threading.local()
+        self._puts = 0
+        self._lock = threading.Lock()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, version: str, query: str):
+        """(topic, section, token_count) or None; topic is None for cached misses"""
+        key = query_key(query)
+        try:
+            conn = self._conn()
+            row = conn.execute(
+                "SELECT topic, section, token_count, last_used FROM responses "
+                "WHERE version = ? AND query_key = ?", (version, key)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[3] > TOUCH_INTERVAL:
+                conn.execute("UPDATE responses SET last_used = ? WHERE version = ? AND query_key = ?",
+                             (now, version, key))
+            return row[0], row[1], row[2]
+        except sqlite3.Error:
+            return None
+
+    def put(self, version: str, query: str, topic, section, token_count: int) -> None:
+        try:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (version, query_key(query), topic, section, token_count, time.time()))
+        except sqlite3.Error:
+            return
+        with self._lock:
+            self._puts += 1
+            evict = self._puts % EVICT_EVERY == 0
+        if evict:
+            self.evict()
+
+    def evict(self) -> None:
+        """Trim the table to max_rows, least recently used first"""
+        try:
+            self._conn().execute(
+                "DELETE FROM responses WHERE (version, query_key) IN ("
+                "SELECT version, query_key FROM responses ORDER BY last_used DESC "
+                "LIMIT -1 OFFSET ?)", (self.max_rows,))
+        except sqlite3.Error:
+            pass
+
+    def invalidate_other_versions(self, version: str) -> None:
+        """Drop rows cached for any other knowledge base version"""
+        try:
+            self._conn().execute("DELETE FROM responses WHERE version != ?", (version,))
+        except sqlite3.Error:
+            pass
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,245 @@
+# sandbox.py
+"""
+Sandboxed example runner for CompleteGPTOSSTutor
+Executes a knowledge base snippet (including its `if __name__ == "__main__"`
+demo) in a pool of pre-warmed, isolated Python worker processes:
+ - each worker runs exactly one snippet and is then replaced in the background
+ - CPU time, address space and file size are capped (POSIX `resource` limits)
+ - wall-clock time is capped by the parent, which kills overrunning workers
+ - an audit hook (which Python code cannot remove) rejects sockets, subprocesses,
+   exec/spawn/fork and ctypes inside the worker, so snippets have no network
+   and cannot start other programs; on Linux the worker also runs in its own
+   network namespace (`unshare -rn`) when unprivileged namespaces are allowed
+Finished runs are cached per snippet hash, so repeated runs never re-execute;
+timeouts and resource-limit kills are not cached and are retried next time.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+CPU_SECONDS = 5
+MEMORY_BYTES = 256 * 1024 * 1024
+FILE_BYTES = 1024 * 1024
+WALL_SECONDS = 10
+MAX_OUTPUT_CHARS = 20000
+
+# POSIX signals raised by the resource limits below
+_SIGNAL_REASONS = {24: "CPU time limit exceeded", 25: "file size limit exceeded", 9: "killed"}
+
+# Audit events a snippet may not raise (prefixes end with ".")
+_BLOCKED_EVENTS = ("socket.", "subprocess.Popen", "os.system", "os.exec", "os.posix_spawn", "os.spawn",
+                   "os.fork", "os.forkpty", "os.startfile", "pty.spawn", "ctypes.")
+
+_unshare_prefix = None
+
+
+def snippet_hash(code: str) -> str:
+    """Stable cache key for a snippet"""
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+
+def _isolation_prefix() -> list:
+    """`unshare -rn` when this machine lets us create a network namespace, else []"""
+    global _unshare_prefix
+    if _unshare_prefix is None:
+        _unshare_prefix = []
+        unshare = shutil.which("unshare") if sys.platform.startswith("linux") else None
+        if unshare:
+            try:
+                probe = subprocess.run([unshare, "-rn", "true"], capture_output=True, timeout=5)
+                if probe.returncode == 0:
+                    _unshare_prefix = [unshare, "-rn"]
+            except (OSError, subprocess.SubprocessError):
+                pass
+    return _unshare_prefix
+
+
+class _Worker:
+    """One pre-warmed interpreter waiting for a single job on stdin"""
+
+    def __init__(self):
+        self.workdir = tempfile.mkdtemp(prefix="tutor_run_")
+        env = {"PYTHONIOENCODING": "utf-8", "PYTHONDONTWRITEBYTECODE": "1"}
+        if os.name == "nt":
+            for key in ("SYSTEMROOT", "PATH"):  # needed to start Python on Windows
+                if key in os.environ:
+                    env[key] = os.environ[key]
+        self.proc = subprocess.Popen(
+            _isolation_prefix() + [sys.executable, "-I", os.path.abspath(__file__), "--worker"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            cwd=self.workdir, env=env, text=True, encoding="utf-8"
+        )
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def run(self, code: str, timeout: float) -> dict:
+        job = json.dumps({"code": code}) + "\n"
+        try:
+            out, err = self.proc.communicate(job, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self.kill()
+            return {"ok": False, "output": "", "error": f"Timed out after {timeout:g}s", "completed": False}
+        finally:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+        try:
+            return json.loads(out.strip().splitlines()[-1])
+        except (ValueError, IndexError):
+            # Killed by a resource limit (e.g. SIGXCPU) before it could reply
+            rc = self.proc.returncode
+            if err.strip():
+                reason = err.strip().splitlines()[-1]
+            elif rc is not None and rc < 0:
+                reason = _SIGNAL_REASONS.get(-rc, f"signal {-rc}")
+            else:
+                reason = f"exit code {rc}"
+            return {"ok": False, "output": "", "error": f"Worker terminated: {reason}", "completed": False}
+
+    def kill(self) -> None:
+        try:
+            self.proc.kill()
+            self.proc.communicate(timeout=1)
+        except Exception:
+            pass
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class SnippetPool:
+    """Pool of pre-warmed sandbox workers with a per-snippet result cache"""
+
+    def __init__(self, size: int = 2, timeout: float = WALL_SECONDS, cache_size: int = 128):
+        self.size = size
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self._idle = queue.Queue()
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._closed = False
+        for _ in range(size):
+            self._refill()
+        # Idle workers' temporary directories go with them at exit
+        atexit.register(self.close)
+
+    def _refill(self) -> None:
+        """Start a replacement worker off the caller's thread"""
+        def spawn():
+            if self._closed:
+                return
+            try:
+                self._idle.put(_Worker())
+            except OSError:
+                pass
+        threading.Thread(target=spawn, daemon=True).start()
+
+    def _take_worker(self) -> _Worker:
+        while True:
+            try:
+                worker = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                # Every worker is busy; start one inline rather than failing
+                return _Worker()
+            if worker.alive():
+                return worker
+            worker.kill()
+            self._refill()
+
+    def run(self, code: str) -> dict:
+        """
+        Execute a snippet in the sandbox
+        Returns a dict with ok, output, error, seconds and cached.
+        """
+        key = snippet_hash(code)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return dict(self._cache[key], cached=True)
+
+        started = time.perf_counter()
+        worker = self._take_worker()
+        self._refill()
+        result = worker.run(code, self.timeout)
+        result["seconds"] = round(time.perf_counter() - started, 3)
+
+        # Timeouts and resource-limit kills depend on machine load; only cache finished runs
+        if result.pop("completed", True):
+            with self._lock:
+                self._cache[key] = result
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return dict(result, cached=False)
+
+    def close(self) -> None:
+        """Stop all idle workers"""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().kill()
+            except queue.Empty:
+                break
+
+
+def _apply_limits() -> None:
+    """Resource limits, applied before taking a job"""
+    try:
+        import resource
+        resource.setrlimit(resource.RLIMIT_CPU, (CPU_SECONDS, CPU_SECONDS + 1))
+        resource.setrlimit(resource.RLIMIT_AS, (MEMORY_BYTES, MEMORY_BYTES))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (FILE_BYTES, FILE_BYTES))
+    except (ImportError, ValueError, OSError):
+        pass  # Windows or a platform that refuses: the wall-clock limit still applies
+
+
+def _audit_hook(event: str, args) -> None:
+    if event.startswith(_BLOCKED_EVENTS):
+        raise PermissionError(f"{event} is disabled in the tutor sandbox (no network or subprocesses)")
+
+
+def _worker_main() -> None:
+    """Entry point of a sandbox worker process"""
+    import contextlib
+    import io
+    import traceback
+
+    _apply_limits()
+    # Warm the modules most snippets import so the job starts instantly
+    import math, re, typing  # noqa: F401,E401
+    # Installed last: audit hooks cannot be removed, and the warm-up above is trusted
+    sys.addaudithook(_audit_hook)
+
+    real_stdout = sys.stdout
+    line = sys.stdin.readline()
+    if not line:
+        # The parent exited without giving us a job: remove our work directory
+        workdir = os.getcwd()
+        os.chdir(os.path.dirname(workdir))
+        shutil.rmtree(workdir, ignore_errors=True)
+        return
+    job = json.loads(line)
+    buffer = io.StringIO()
+    result = {"ok": True, "output": "", "error": None}
+    try:
+        with contextlib.redirect_stdout(buffer), contextlib.redirect_stderr(buffer):
+            exec(compile(job["code"], "<snippet>", "exec"), {"__name__": "__main__"})
+    except BaseException:
+        etype, exc, tb = sys.exc_info()
+        result["ok"] = False
+        # Skip this function's own frame; students only care about the snippet
+        result["error"] = "".join(traceback.format_exception(etype, exc, tb.tb_next))
+    result["output"] = buffer.getvalue()[:MAX_OUTPUT_CHARS]
+    real_stdout.write(json.dumps(result) + "\n")
+    real_stdout.flush()
+
+
+if __name__ == "__main__" and "--worker" in sys.argv:
+    _worker_main()
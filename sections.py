@@ -0,0 +1,285 @@
+# sections.py
+"""
+Section index for CompleteGPTOSSTutor
+Parses each knowledge base code block once with `ast` and splits it into
+per-function / per-class sections, so a query such as "prime factors" can be
+answered with just `prime_factors` (plus the imports it uses) instead of the
+whole prime_numbers snippet.
+"""
+
+import ast
+import builtins
+import re
+import symtable
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_CAMEL_RE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+
+def strip_fences(code: str) -> str:
+    """Remove the ```python / ``` markdown fences around a snippet"""
+    lines = code.strip("\n").split("\n")
+    if lines and lines[0].strip().startswith("```"):
+        lines = lines[1:]
+    if lines and lines[-1].strip() == "```":
+        lines = lines[:-1]
+    return "\n".join(lines)
+
+
+def _normalize(word: str) -> str:
+    """Lowercase and drop a plural 's' so 'primes' and 'prime' compare equal"""
+    word = word.lower()
+    if len(word) > 4 and word.endswith("s") and not word.endswith("ss"):
+        word = word[:-1]
+    return word
+
+
+def name_words(name: str) -> tuple:
+    """Split snake_case / CamelCase identifiers into normalized words"""
+    spaced = _CAMEL_RE.sub("_", name)
+    return tuple(_normalize(w) for w in _WORD_RE.findall(spaced.lower()))
+
+
+def query_words(query: str) -> set:
+    """Normalized words of a user query"""
+    return {_normalize(w) for w in _WORD_RE.findall(query.lower())}
+
+
+def _word_in_query(word: str, words: set) -> bool:
+    """A section word matches exactly or as a prefix ('memo' -> 'memoized')"""
+    if word in words:
+        return True
+    return len(word) >= 4 and any(w.startswith(word) for w in words)
+
+
+class Section:
+    """A single top-level function or class extracted from a topic snippet"""
+
+    def __init__(self, topic: str, name: str, kind: str, source: str, imports: list, requires: list = None):
+        self.topic = topic
+        self.name = name
+        self.kind = kind
+        self.source = source
+        self.imports = imports
+        # Source of the top-level helpers / constants it calls, in snippet order
+        self.requires = requires or []
+        self.words = name_words(name)
+
+    def render(self) -> str:
+        """Section source with its imports and helpers, wrapped like a knowledge base snippet"""
+        parts = []
+        if self.imports:
+            parts.append("\n".join(self.imports))
+        parts.extend(self.requires)
+        parts.append(self.source)
+        return "```python\n" + "\n\n".join(parts) + "\n```"
+
+    def __repr__(self) -> str:
+        return f"Section({self.topic}.{self.name})"
+
+
+class PackedSection(Section):
+    """
+    A Section of a packed (compressed) topic: only its name is kept, and the
+    source is parsed again from the topic's code whenever it is needed
+    """
+
+    def __init__(self, section: Section, table):
+        self.topic = section.topic
+        self.name = section.name
+        self.kind = section.kind
+        self.words = section.words
+        self.table = table
+
+    def _parsed(self) -> Section:
+        for section in parse_sections(self.topic, self.table[self.topic]["code"]):
+            if section.name == self.name:
+                return section
+        raise KeyError(f"{self.topic}.{self.name} is no longer in the knowledge base")
+
+    @property
+    def source(self) -> str:
+        return self._parsed().source
+
+    @property
+    def imports(self) -> list:
+        return self._parsed().imports
+
+    @property
+    def requires(self) -> list:
+        return self._parsed().requires
+
+    def render(self) -> str:
+        return self._parsed().render()
+
+
+def _bound_names(node) -> list:
+    """Names an import statement binds in the module namespace"""
+    names = []
+    for alias in node.names:
+        if alias.asname:
+            names.append(alias.asname)
+        else:
+            names.append(alias.name.split(".")[0])
+    return names
+
+
+def _import_line(node, used: set):
+    """The import statement cut down to the names in `used` (None if it binds none)"""
+    aliases = [(alias, bound) for alias, bound in zip(node.names, _bound_names(node)) if bound in used]
+    if not aliases:
+        return None
+    names = ", ".join(alias.name + (f" as {alias.asname}" if alias.asname else "") for alias, _ in aliases)
+    if isinstance(node, ast.ImportFrom):
+        return f"from {'.' * node.level}{node.module or ''} import {names}"
+    return f"import {names}"
+
+
+def _global_names(source: str) -> set:
+    """Module-level names a top-level statement reads (its locals and parameters excluded)"""
+    names = set()
+
+    def walk(table, top):
+        for symbol in table.get_symbols():
+            if symbol.is_referenced() and (top or symbol.is_global()):
+                names.add(symbol.get_name())
+        for child in table.get_children():
+            walk(child, False)
+
+    walk(symtable.symtable(source, "<section>", "exec"), True)
+    return names
+
+
+def _assigned_names(node) -> list:
+    targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+    return [n.id for t in targets for n in ast.walk(t) if isinstance(n, ast.Name)]
+
+
+def parse_sections(topic: str, code: str) -> list:
+    """
+    Split one knowledge base snippet into Sections (empty if it doesn't
+    parse). Each section carries the imports, functions, classes and
+    constants it uses, transitively, so it runs on its own; a section that
+    reads a name bound any other way (a top-level loop or try block, or not
+    at all) is left out, and the whole snippet is served instead.
+    """
+    source = strip_fences(code)
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return []
+
+    lines = source.split("\n")
+    imports, definitions = [], {}
+    for index, node in enumerate(tree.body):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            imports.append(node)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            start = min([node.lineno] + [d.lineno for d in node.decorator_list]) - 1
+            # Keep the comment lines directly above the definition
+            while start > 0 and lines[start - 1].lstrip().startswith("#"):
+                start -= 1
+            body = "\n".join(lines[start:node.end_lineno])
+            definitions[node.name] = (index, node, body, _global_names(body))
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            body = "\n".join(lines[node.lineno - 1:node.end_lineno])
+            for name in _assigned_names(node):
+                definitions[name] = (index, node, body, _global_names(body))
+    imported = {name for node in imports for name in _bound_names(node)}
+
+    sections = []
+    for name, (index, node, body, used) in definitions.items():
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            kind = "function"
+        elif isinstance(node, ast.ClassDef):
+            kind = "class"
+        else:
+            continue
+
+        needed, pending, all_used = set(), set(used), set(used)
+        while pending:
+            dependency = pending.pop()
+            if dependency == name or dependency in needed or dependency not in definitions:
+                continue
+            needed.add(dependency)
+            pending |= definitions[dependency][3]
+            all_used |= definitions[dependency][3]
+        # Anything bound elsewhere (a loop, a try block, or nowhere): serve the whole snippet
+        unresolved = all_used - set(definitions) - imported - set(dir(builtins))
+        if unresolved:
+            continue
+        # One entry per statement (an assignment can bind several names), in snippet order
+        requires = sorted({definitions[d][0]: definitions[d][2] for d in needed}.items())
+        import_lines = [line for line in (_import_line(imp, all_used) for imp in imports) if line]
+        sections.append(Section(topic, name, kind, body, import_lines, [text for _, text in requires]))
+    return sections
+
+
+class SectionIndex:
+    """Inverted index from name words to the sections of every topic"""
+
+    def __init__(self, knowledge_base: dict):
+        self.sections = {}
+        self.word_index = {}
+        for topic, data in knowledge_base.items():
+            self.add_topic(topic, data["code"])
+
+    def add_topic(self, topic: str, code: str, parsed: list = None) -> None:
+        """Parse a topic's snippet (unless already `parsed`) and index its sections"""
+        self.remove_topic(topic)
+        topic_words = set(name_words(topic))
+        if parsed is None:
+            parsed = parse_sections(topic, code)
+        sections = []
+        for section in parsed:
+            # A section named after the topic itself ("fibonacci") says nothing
+            # more specific than the topic does, so it is never singled out
+            if set(section.words) <= topic_words:
+                continue
+            sections.append(section)
+            for word in set(section.words):
+                self.word_index.setdefault(word, []).append(section)
+        self.sections[topic] = sections
+
+    def remove_topic(self, topic: str) -> None:
+        """Drop a topic's sections from the index"""
+        for section in self.sections.pop(topic, []):
+            for word in set(section.words):
+                bucket = self.word_index.get(word, [])
+                if section in bucket:
+                    bucket.remove(section)
+                if not bucket:
+                    self.word_index.pop(word, None)
+
+    def _candidates(self, words: set, topic=None) -> list:
+        if topic is not None:
+            return self.sections.get(topic, [])
+        seen, found = set(), []
+        for word in words:
+            # Exact word plus every prefix a section word could match on
+            keys = {word} | {word[:i] for i in range(4, len(word))}
+            for key in keys:
+                for section in self.word_index.get(key, ()):
+                    if id(section) not in seen:
+                        seen.add(id(section))
+                        found.append(section)
+        return found
+
+    def best_section(self, query: str, topic=None, min_words: int = 1):
+        """
+        Return the one section whose name words all appear in the query,
+        or None when nothing (or more than one equally good section) fits.
+        """
+        words = query_words(query)
+        best, best_score, tied = None, 0, False
+        for section in self._candidates(words, topic):
+            if len(section.words) < min_words:
+                continue
+            if not all(_word_in_query(w, words) for w in section.words):
+                continue
+            score = len(section.words)
+            if score > best_score:
+                best, best_score, tied = section, score, False
+            elif score == best_score:
+                tied = True
+        return None if tied else best
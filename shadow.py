@@ -0,0 +1,263 @@
+# shadow.py
+"""
+Shadow mode for matcher changes
+Runs a candidate matcher next to the production one (tutor.find_best_match)
+on the same queries and snapshot, and reports where their answers differ and
+how their latencies compare. Live queries are handed to a background worker
+with a non-blocking put, so the response path only pays for the hand-off;
+both matchers are timed there, under the same conditions.
+
+Candidates:
+    combined     one OR-ed regex per topic, as in bulk_match.py
+    re           plain `re.search` for every pattern (no keyword chains / RE2)
+    kb:PATH      production matching against another knowledge_base.py,
+                 to check edited pattern lists before they go live
+
+Usage:
+    python shadow.py queries.txt --candidate combined [--report shadow.json]
+`queries.txt` holds one query per line. Live: tutor.enable_shadow("combined").
+"""
+
+import argparse
+import atexit
+import collections
+import json
+import queue
+import re
+import sys
+import threading
+import time
+
+from matcher import match_window
+
+MAX_PENDING = 10000
+MAX_EXAMPLES = 200
+MAX_SAMPLES = 100000
+
+
+class CombinedRegexCandidate:
+    """First topic whose combined alternation matches"""
+
+    name = "combined"
+
+    def __init__(self, tutor):
+        self.tutor = tutor
+        self._compiled = (None, None)
+
+    def match(self, query: str, snapshot):
+        version, compiled = self._compiled
+        if version != snapshot.version:
+            from bulk_match import compile_topics
+            compiled = compile_topics(snapshot.knowledge_base)
+            self._compiled = (snapshot.version, compiled)
+        text = match_window(query, self.tutor.max_match_chars).lower()
+        for topic, regex in compiled:
+            if regex.search(text):
+                return topic
+        return None
+
+
+class ReCandidate:
+    """Every pattern through plain `re`, the engine the tutor started with"""
+
+    name = "re"
+
+    def __init__(self, tutor):
+        self.tutor = tutor
+        self._compiled = (None, None)
+
+    def match(self, query: str, snapshot):
+        version, compiled = self._compiled
+        if version != snapshot.version:
+            compiled = [(topic.name, [re.compile(p) for p in topic.patterns])
+                        for topic in snapshot.topics.records]
+            self._compiled = (snapshot.version, compiled)
+        text = match_window(query, self.tutor.max_match_chars).lower()
+        for topic, regexes in compiled:
+            for regex in regexes:
+                if regex.search(text):
+                    return topic
+        return None
+
+
+class KnowledgeBaseCandidate:
+    """Production matching against a different knowledge base file"""
+
+    def __init__(self, tutor, path: str):
+        from kb_state import load_knowledge_base_file
+        self.tutor = tutor
+        self.name = f"kb:{path}"
+        self.snapshot = tutor.prepare_snapshot(load_knowledge_base_file(path))
+
+    def match(self, query: str, snapshot):
+        return self.tutor.find_best_match(query, self.snapshot)
+
+
+def make_candidate(tutor, spec: str):
+    if spec == "combined":
+        return CombinedRegexCandidate(tutor)
+    if spec == "re":
+        return ReCandidate(tutor)
+    if spec.startswith("kb:"):
+        return KnowledgeBaseCandidate(tutor, spec[3:])
+    raise ValueError(f"unknown candidate '{spec}' (combined, re or kb:PATH)")
+
+
+def _percentile(values: list, p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+
+class ShadowComparator:
+    """Compares production and candidate matching, live (background) or on replay"""
+
+    def __init__(self, tutor, candidate, max_pending: int = MAX_PENDING):
+        self.tutor = tutor
+        self.candidate = candidate
+        self.compared = 0
+        self.dropped = 0
+        self.pairs = collections.Counter()
+        self.examples = []
+        self._prod_ms = []
+        self._cand_ms = []
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="shadow-matcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def submit(self, query: str, snapshot) -> None:
+        """Queue a live query for comparison; never blocks"""
+        try:
+            self._queue.put_nowait((query, snapshot))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            query, snapshot = self._queue.get()
+            try:
+                self.compare(query, snapshot)
+            except Exception:
+                pass
+
+    def compare(self, query: str, snapshot=None) -> bool:
+        """Run both matchers on one query; True when they agree"""
+        snapshot = snapshot or self.tutor.snapshot
+        runs = [("production", lambda: self.tutor.find_best_match(query, snapshot)),
+                ("candidate", lambda: self.candidate.match(query, snapshot))]
+        # Alternate which one goes first so neither always pays for cold caches
+        if self.compared % 2:
+            runs.reverse()
+        answers, ms = {}, {}
+        for label, run in runs:
+            started = time.perf_counter()
+            answers[label] = run()
+            ms[label] = (time.perf_counter() - started) * 1000
+        expected, actual = answers["production"], answers["candidate"]
+
+        with self._lock:
+            self.compared += 1
+            if len(self._prod_ms) < MAX_SAMPLES:
+                self._prod_ms.append(ms["production"])
+                self._cand_ms.append(ms["candidate"])
+            if expected != actual:
+                self.pairs[(expected, actual)] += 1
+                if len(self.examples) < MAX_EXAMPLES:
+                    self.examples.append({"query": query[:200], "production": expected, "candidate": actual})
+        return expected == actual
+
+    def replay(self, queries) -> dict:
+        for query in queries:
+            self.compare(query)
+        return self.report()
+
+    def report(self) -> dict:
+        with self._lock:
+            prod, cand = list(self._prod_ms), list(self._cand_ms)
+            disagreements = sum(self.pairs.values())
+            report = {
+                "candidate": self.candidate.name,
+                "compared": self.compared,
+                "dropped": self.dropped,
+                "disagreements": disagreements,
+                "disagreement_rate": disagreements / self.compared if self.compared else 0.0,
+                "pairs": [{"production": p, "candidate": c, "count": n}
+                          for (p, c), n in self.pairs.most_common()],
+                "examples": list(self.examples),
+            }
+        for label, values in (("production", prod), ("candidate", cand)):
+            report[f"{label}_ms"] = {
+                "mean": sum(values) / len(values) if values else 0.0,
+                "p50": _percentile(values, 50),
+                "p95": _percentile(values, 95),
+                "p99": _percentile(values, 99),
+            }
+        mean_cand = report["candidate_ms"]["mean"]
+        report["speedup"] = report["production_ms"]["mean"] / mean_cand if mean_cand else 0.0
+        return report
+
+    def write_report(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"Candidate {report['candidate']}: {report['compared']} queries compared "
+        f"({report['dropped']} dropped), {report['disagreements']} disagreements "
+        f"({report['disagreement_rate']:.2%})",
+    ]
+    for label in ("production", "candidate"):
+        ms = report[f"{label}_ms"]
+        lines.append(f"  {label:<11} mean {ms['mean']:.4f} ms   p50 {ms['p50']:.4f}   "
+                     f"p95 {ms['p95']:.4f}   p99 {ms['p99']:.4f}")
+    lines.append(f"  candidate is {report['speedup']:.2f}x the speed of production")
+    for pair in report["pairs"][:10]:
+        lines.append(f"  {pair['count']:>7} x  production {pair['production']} -> candidate {pair['candidate']}")
+    for example in report["examples"][:5]:
+        lines.append(f"      e.g. {example['query'][:80]!r}")
+    return "\n".join(lines)
+
+
+def enable(tutor, candidate, report_path: str = None) -> ShadowComparator:
+    """Start live shadowing; the report is written at exit when `report_path` is set"""
+    if isinstance(candidate, str):
+        candidate = make_candidate(tutor, candidate)
+    shadow = ShadowComparator(tutor, candidate).start()
+    if report_path:
+        atexit.register(shadow.write_report, report_path)
+    return shadow
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare a candidate matcher with production on replayed queries")
+    parser.add_argument("queries", help="file with one query per line, or - for stdin")
+    parser.add_argument("--candidate", default="combined", help="combined, re or kb:PATH")
+    parser.add_argument("--report", help="write the full JSON report here")
+    args = parser.parse_args(argv)
+
+    from tutor import CompleteGPTOSSTutor
+
+    tutor = CompleteGPTOSSTutor()
+    shadow = ShadowComparator(tutor, make_candidate(tutor, args.candidate))
+    source = sys.stdin if args.queries == "-" else open(args.queries, encoding="utf-8", errors="replace")
+    try:
+        report = shadow.replay(line.rstrip("\r\n") for line in source)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    print(format_report(report))
+    if args.report:
+        shadow.write_report(args.report)
+    # Exit status 1 when answers changed, for use in CI
+    return 1 if report["disagreements"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,318 @@
+# snippet_store.py
+"""
+Compressed, deduplicated storage for knowledge base snippets
+build_pack() turns the knowledge_base dict into one pack file:
+ - each code snippet is split into blocks at its top-level statements (every
+   import, def, class or other statement, plus the markdown fences); identical
+   blocks (shared imports, fences, helpers copied between topics) are stored
+   once and topics keep lists of block ids
+ - every block is compressed on its own with zlib (or zstd when the
+   `zstandard` package is installed and asked for) against a shared
+   dictionary trained on the corpus: the lines that recur across blocks,
+   most frequent last, so even short blocks compress well
+SnippetStore reads a pack through mmap and decompresses a topic only when it
+is asked for, keeping a small LRU cache of decoded topics. Its topic_table()
+is a TopicTable whose code and explanation come from the store, so the tutor
+can run from a pack (TUTOR_SNIPPET_PACK=path) without holding the corpus in
+memory.
+
+Usage:
+    python snippet_store.py build [knowledge_base.py] [-o knowledge_base.pack] [--codec zlib|zstd]
+    python snippet_store.py stats knowledge_base.pack
+"""
+
+import argparse
+import ast
+import collections
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import zlib
+
+from topics import Topic, TopicTable, topic_digest
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC = b"TUTORPACK2\n"
+ZDICT_BYTES = 32 * 1024
+CACHE_TOPICS = 32
+
+
+def split_blocks(code: str) -> list:
+    """
+    One block per top-level statement, per markdown fence and per run of blank
+    lines or comments between them; "".join() restores the code exactly.
+    Code that does not parse is kept as a single block.
+    """
+    lines = code.split("\n")
+    lines = [line + "\n" for line in lines[:-1]] + [lines[-1]]
+    first, last = 0, len(lines)
+    if lines[0].strip().startswith("```"):
+        first = 1
+    if last > first and lines[last - 1].strip() == "```":
+        last -= 1
+    elif last > first + 1 and lines[last - 1] == "" and lines[last - 2].strip() == "```":
+        last -= 2
+    try:
+        tree = ast.parse("".join(lines[first:last]))
+    except (SyntaxError, ValueError):
+        return [code]
+
+    starts = {0, first, last}
+    for node in tree.body:
+        decorators = getattr(node, "decorator_list", [])
+        starts.add(first + min([node.lineno] + [d.lineno for d in decorators]) - 1)
+        starts.add(first + node.end_lineno)
+    bounds = sorted(start for start in starts if start < len(lines)) + [len(lines)]
+    return ["".join(lines[a:b]) for a, b in zip(bounds, bounds[1:]) if a < b]
+
+
+def train_zdict(blocks: list, size: int = ZDICT_BYTES) -> bytes:
+    """Lines that recur across blocks, most frequent at the end where zlib finds them cheapest"""
+    counts = collections.Counter()
+    for block in blocks:
+        counts.update(set(line for line in block.split("\n") if len(line.strip()) > 3))
+    common = [line for line, n in counts.items() if n > 1]
+    common.sort(key=lambda line: (counts[line], len(line)))
+    chunks, total = [], 0
+    for line in reversed(common):
+        data = (line + "\n").encode("utf-8")
+        if total + len(data) > size:
+            break
+        chunks.append(data)
+        total += len(data)
+    return b"".join(reversed(chunks))
+
+
+class _Codec:
+    def __init__(self, name: str, zdict: bytes):
+        if name == "zstd" and zstandard is None:
+            raise RuntimeError("the zstd codec needs the zstandard package (pip install zstandard)")
+        if name not in ("zlib", "zstd"):
+            raise ValueError(f"unknown codec '{name}'")
+        self.name = name
+        self.zdict = zdict
+        if name == "zstd":
+            dict_data = (zstandard.ZstdCompressionDict(zdict, dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+                         if zdict else None)
+            self._compressor = zstandard.ZstdCompressor(level=19, dict_data=dict_data)
+            self._decompressor = zstandard.ZstdDecompressor(dict_data=dict_data)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.name == "zstd":
+            return self._compressor.compress(data)
+        # Raw deflate: no per-block zlib header or checksum on many small blocks
+        compressor = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=self.zdict)
+        return compressor.compress(data) + compressor.flush()
+
+    def decompress(self, data: bytes) -> bytes:
+        if self.name == "zstd":
+            return self._decompressor.decompress(data)
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS, zdict=self.zdict)
+        return decompressor.decompress(data) + decompressor.flush()
+
+
+def build_pack(knowledge_base: dict, path: str, codec: str = "zlib") -> dict:
+    """Write a pack file for a knowledge base dict (atomically); returns size stats"""
+    block_ids, blocks, topics = {}, [], []
+
+    def intern_block(text: str) -> int:
+        if text not in block_ids:
+            block_ids[text] = len(blocks)
+            blocks.append(text)
+        return block_ids[text]
+
+    raw_bytes = 0
+    for name, data in knowledge_base.items():
+        raw_bytes += len(data["code"].encode("utf-8")) + len(data["explanation"].encode("utf-8"))
+        topics.append({
+            "name": name,
+            "patterns": list(data["patterns"]),
+            "digest": topic_digest(data),
+            "code": [intern_block(block) for block in split_blocks(data["code"])],
+            "explanation": intern_block(data["explanation"]),
+        })
+
+    zdict = train_zdict(blocks)
+    compressor = _Codec(codec, zdict)
+    payload, offsets, position = [zdict], [], len(zdict)
+    for block in blocks:
+        data = compressor.compress(block.encode("utf-8"))
+        offsets.append([position, len(data)])
+        payload.append(data)
+        position += len(data)
+
+    header = json.dumps({"codec": codec, "zdict": len(zdict), "blocks": offsets, "topics": topics},
+                        separators=(",", ":")).encode("utf-8")
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(MAGIC + struct.pack(">I", len(header)) + header)
+        for data in payload:
+            f.write(data)
+    # Readers keep their mapping of the old file until they reload
+    os.replace(tmp, path)
+    return {
+        "topics": len(topics),
+        "blocks": sum(len(t["code"]) + 1 for t in topics),
+        "unique_blocks": len(blocks),
+        "raw_bytes": raw_bytes,
+        "unique_bytes": sum(len(b.encode("utf-8")) for b in blocks),
+        "pack_bytes": os.path.getsize(path),
+    }
+
+
+class SnippetStore:
+    """Read-only view of a pack file; also a Mapping-like source for load_topics()"""
+
+    def __init__(self, path: str, cache_size: int = CACHE_TOPICS):
+        self.path = os.path.abspath(path)
+        self.cache_size = cache_size
+        self._open()
+
+    def _open(self) -> None:
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path} is not a snippet pack")
+        start = len(MAGIC)
+        (header_len,) = struct.unpack(">I", self._map[start:start + 4])
+        header = json.loads(self._map[start + 4:start + 4 + header_len].decode("utf-8"))
+        self._data_start = start + 4 + header_len
+        self._blocks = header["blocks"]
+        self.topics = header["topics"]
+        self.ids = {t["name"]: i for i, t in enumerate(self.topics)}
+        zdict = self._map[self._data_start:self._data_start + header["zdict"]]
+        self._codec = _Codec(header["codec"], zdict)
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Pickled snapshots (warm start) reopen the pack instead of copying it
+        return {"path": self.path, "cache_size": self.cache_size}
+
+    def __setstate__(self, state):
+        self.path = state["path"]
+        self.cache_size = state["cache_size"]
+        self._open()
+
+    def _block(self, block_id: int) -> str:
+        offset, length = self._blocks[block_id]
+        start = self._data_start + offset
+        return self._codec.decompress(self._map[start:start + length]).decode("utf-8")
+
+    def topic_text(self, topic_id: int) -> tuple:
+        """(code, explanation) of one topic, from the hot cache or decompressed"""
+        with self._lock:
+            cached = self._cache.get(topic_id)
+            if cached is not None:
+                self._cache.move_to_end(topic_id)
+                return cached
+        entry = self.topics[topic_id]
+        text = ("".join(self._block(b) for b in entry["code"]), self._block(entry["explanation"]))
+        with self._lock:
+            self._cache[topic_id] = text
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return text
+
+    # Dict-literal compatible access (kb_lint, bulk_match, ...)
+    def items(self):
+        for name in self.ids:
+            yield name, self[name]
+
+    def __getitem__(self, name: str) -> dict:
+        topic_id = self.ids[name]
+        code, explanation = self.topic_text(topic_id)
+        return {"patterns": list(self.topics[topic_id]["patterns"]), "code": code, "explanation": explanation}
+
+    def __contains__(self, name) -> bool:
+        return name in self.ids
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self) -> int:
+        return len(self.topics)
+
+    def topic_table(self, previous: TopicTable = None) -> "PackedTopicTable":
+        """Topic records whose text stays in the pack; matchers reused from `previous`"""
+        from matcher import compile_pattern
+
+        reuse = {topic.digest: topic.matchers for topic in previous.records} if previous else {}
+        records = []
+        for topic_id, entry in enumerate(self.topics):
+            patterns = tuple(sys.intern(p) for p in entry["patterns"])
+            matchers = reuse.get(entry["digest"]) or tuple(compile_pattern(p) for p in patterns)
+            # No text on the record: the store decodes it, addressed by topic id
+            records.append(Topic(topic_id, sys.intern(entry["name"]), patterns, matchers, entry["digest"]))
+        return PackedTopicTable(records, self)
+
+
+class PackedTopicTable(TopicTable):
+    """TopicTable backed by a SnippetStore; text is decompressed on demand"""
+
+    lazy = True
+
+    def __init__(self, records: list, store: SnippetStore):
+        super().__init__(records)
+        self.store = store
+
+    def code(self, topic: Topic) -> str:
+        return self.store.topic_text(topic.id)[0]
+
+    def explanation(self, topic: Topic) -> str:
+        return self.store.topic_text(topic.id)[1]
+
+
+def is_snippet_pack(path: str) -> bool:
+    """True if the file starts with the pack header, whatever it is called"""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def load_snippet_pack(path: str) -> SnippetStore:
+    return SnippetStore(path)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build or inspect a compressed snippet pack")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="pack a knowledge_base.py")
+    build.add_argument("source", nargs="?", help="knowledge_base.py to pack (default: the bundled one)")
+    build.add_argument("-o", "--out", default="knowledge_base.pack")
+    build.add_argument("--codec", choices=["zlib", "zstd"], default="zlib")
+    stats = sub.add_parser("stats", help="show what a pack holds")
+    stats.add_argument("pack")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        if args.source:
+            from kb_state import load_knowledge_base_file
+            knowledge_base = load_knowledge_base_file(args.source)
+        else:
+            from knowledge_base import knowledge_base
+        info = build_pack(knowledge_base, args.out, args.codec)
+        print(f"{info['topics']} topics, {info['unique_blocks']}/{info['blocks']} unique blocks")
+        print(f"{info['raw_bytes']} bytes of text -> {info['unique_bytes']} after dedup -> "
+              f"{info['pack_bytes']} in {args.out} ({info['raw_bytes'] / max(info['pack_bytes'], 1):.1f}x)")
+        return 0
+
+    store = SnippetStore(args.pack)
+    print(f"{args.pack}: {len(store)} topics, {len(store._blocks)} unique blocks, codec {store._codec.name}, "
+          f"{os.path.getsize(args.pack)} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
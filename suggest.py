@@ -0,0 +1,93 @@
+# suggest.py
+"""
+Search-as-you-type suggestions for the tutor's input box
+Candidate phrases come from topic names, function/class names in the code
+snippets, the literal words of each pattern and the GUI's example queries.
+Only phrases the tutor actually answers are kept, each labelled with the topic
+it lands on, so picking one never costs a wasted round trip.
+
+Every prefix of every phrase word maps to the phrases containing it (a
+flattened prefix trie), so a keystroke costs one dict lookup plus ranking a
+handful of candidates.
+"""
+
+import re
+
+from kb_lint import sample_query
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_CAMEL_RE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+# Ranking weight per phrase source
+EXAMPLE_WEIGHT = 3
+NAME_WEIGHT = 2
+PATTERN_WEIGHT = 1
+
+
+def _words(text: str) -> list:
+    return _WORD_RE.findall(text.lower())
+
+
+def _phrase(identifier: str) -> str:
+    """'is_prime' -> 'is prime', 'BankAccount' -> 'bank account'"""
+    return " ".join(_words(_CAMEL_RE.sub(" ", identifier).replace("_", " ")))
+
+
+class SuggestionIndex:
+    """Prefix index over (phrase, topic) suggestions"""
+
+    def __init__(self, entries: list, version: str = None):
+        # entries: [(phrase, topic, weight), ...]; the first of duplicate phrases wins
+        self.version = version
+        self.entries = []
+        self._prefixes = {}
+        seen = set()
+        for phrase, topic, weight in entries:
+            if phrase in seen:
+                continue
+            seen.add(phrase)
+            entry_id = len(self.entries)
+            self.entries.append((phrase, topic, weight))
+            for word in set(_words(phrase)):
+                for end in range(1, len(word) + 1):
+                    self._prefixes.setdefault(word[:end], set()).add(entry_id)
+
+    @classmethod
+    def from_tutor(cls, tutor, examples: list = ()):
+        """Build from the tutor's current snapshot, keeping phrases that get an answer"""
+        snapshot = tutor.snapshot
+        candidates = [(example, EXAMPLE_WEIGHT) for example in examples]
+        for topic, data in snapshot.knowledge_base.items():
+            candidates.append((_phrase(topic), NAME_WEIGHT))
+            for section in snapshot.section_index.sections.get(topic, []):
+                candidates.append((_phrase(section.name), NAME_WEIGHT))
+            candidates.extend((sample_query(p), PATTERN_WEIGHT) for p in data["patterns"])
+
+        entries = []
+        for phrase, weight in candidates:
+            phrase = phrase.strip()
+            topic = tutor.find_best_match(phrase, snapshot) if phrase else None
+            if topic is not None:
+                entries.append((phrase, topic, weight))
+        return cls(entries, snapshot.version)
+
+    def suggest(self, text: str, limit: int = 6) -> list:
+        """
+        [(phrase, topic), ...] for what has been typed so far. The last word is
+        treated as a prefix; earlier words rank phrases that contain them.
+        """
+        words = _words(text)
+        if not words:
+            return []
+        ids = self._prefixes.get(words[-1])
+        if not ids:
+            return []
+        typed = [self._prefixes.get(w, ()) for w in words[:-1]]
+
+        def rank(entry_id):
+            phrase, _, weight = self.entries[entry_id]
+            hits = sum(1 for ids_of_word in typed if entry_id in ids_of_word)
+            return -hits, -weight, len(phrase)
+
+        best = sorted(ids, key=rank)[:limit]
+        return [self.entries[i][:2] for i in best]
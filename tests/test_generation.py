@@ -0,0 +1,122 @@
+import json
+import time
+
+import pytest
+
+from generation import GenerationBackend, Generator, StubBackend, build_prompt, truncate_to_tokens
+
+
+def count_words(text):
+    return len(text.split())
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        GenerationBackend()
+
+
+def test_stub_is_deterministic():
+    prompt = build_prompt("what is a decorator")
+    assert StubBackend().generate(prompt, 50, time.monotonic() + 1) == \
+        StubBackend().generate(prompt, 50, time.monotonic() + 1)
+
+
+def test_cache_hit_on_normalized_question():
+    backend = StubBackend()
+    generator = Generator(backend, count_words)
+    first = generator.respond("What is a decorator")
+    second = generator.respond("  what IS a   decorator ")
+    assert first["status"] == second["status"] == "ok"
+    assert not first["cached"] and second["cached"]
+    assert second["text"] == first["text"]
+    assert backend.calls == 1
+
+
+def test_timeout():
+    generator = Generator(StubBackend(delay=0.5), count_words, timeout=0.05)
+    started = time.monotonic()
+    result = generator.respond("explain generators")
+    assert result["status"] == "timeout"
+    assert time.monotonic() - started < 0.4
+    # Timeouts are not cached
+    assert generator.respond("explain generators")["cached"] is False
+
+
+def test_busy_while_a_timed_out_call_still_runs():
+    generator = Generator(StubBackend(delay=0.3), count_words, timeout=0.05)
+    assert generator.respond("first question")["status"] == "timeout"
+    assert generator.respond("second question")["status"] == "busy"
+    time.sleep(0.4)
+    generator.timeout = 1.0
+    assert generator.respond("second question")["status"] == "ok"
+
+
+def test_truncate_to_tokens():
+    assert truncate_to_tokens("one two three", 5, count_words) == "one two three"
+    assert truncate_to_tokens("one two three four five six", 3, count_words) == "one two three"
+    assert truncate_to_tokens("", 3, count_words) == ""
+
+
+def test_prompt_and_answer_budgets():
+    class EchoBackend(GenerationBackend):
+        name = "echo"
+
+        def generate(self, prompt, max_tokens, deadline):
+            self.prompt = prompt
+            return "word " * 100
+
+    backend = EchoBackend()
+    limit = count_words(build_prompt("")) + 4
+    generator = Generator(backend, count_words, max_prompt_tokens=limit, max_new_tokens=10)
+    result = generator.respond("a b c d e f g h")
+    assert "Student: a b c d\n" in backend.prompt
+    assert result["tokens"] == 10
+    assert count_words(result["text"]) == 10
+
+    topics = [f"topic_{i}" for i in range(50000)]
+    generator = Generator(backend, count_words, max_prompt_tokens=limit + 10, max_new_tokens=10)
+    generator.respond("another question", iter(topics))
+    assert count_words(backend.prompt) <= limit + 10
+    assert "topic_0" in backend.prompt
+
+
+@pytest.fixture
+def tutor(tmp_path, monkeypatch):
+    pytest.importorskip("colorama")
+    monkeypatch.setenv("TUTOR_CACHE_DIR", str(tmp_path))
+    monkeypatch.delenv("TUTOR_GENERATION", raising=False)
+    from tutor import CompleteGPTOSSTutor
+    return CompleteGPTOSSTutor(warm_start=False)
+
+
+def test_miss_without_generation(tutor):
+    assert tutor.generator is None
+    assert tutor.generate_response("what is a decorator").startswith("Sorry")
+
+
+def test_miss_with_generation(tutor):
+    backend = StubBackend()
+    tutor.enable_generation(backend)
+    response = tutor.generate_response("what is a decorator")
+    assert "what is a decorator" in response
+    assert "Generated locally by stub" in response
+    assert backend.calls == 1
+
+
+def test_hits_never_reach_the_generator(tutor):
+    backend = StubBackend()
+    tutor.enable_generation(backend)
+    assert "Generated locally" not in tutor.generate_response("fibonacci sequence")
+    assert backend.calls == 0
+
+
+def test_query_log_marks_generated_answers(tutor, tmp_path):
+    tutor.enable_generation(StubBackend(delay=0.05))
+    logger = tutor.enable_query_log(str(tmp_path / "queries.jsonl"))
+    tutor.generate_response("what is a decorator")
+    tutor.generate_response("fibonacci sequence")
+    logger.close()
+    with open(tmp_path / "queries.jsonl", encoding="utf-8") as f:
+        generated, hit = [json.loads(line) for line in f]
+    assert generated["miss"] and generated["generated"] and generated["ms"] >= 50
+    assert not hit["miss"] and "generated" not in hit
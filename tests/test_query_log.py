@@ -0,0 +1,53 @@
+import json
+import time
+
+import query_log
+from query_log import QueryLogger, log_files
+
+
+def read_records(path):
+    records = []
+    for name in log_files(str(path)):
+        with open(name, encoding="utf-8") as f:
+            records += [json.loads(line) for line in f]
+    return records
+
+
+def wait_written(logger, count):
+    deadline = time.monotonic() + 5
+    while logger.written + logger.dropped < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_writer_survives_a_failed_rotation(tmp_path, monkeypatch):
+    path = tmp_path / "queries.jsonl"
+    logger = QueryLogger(str(path), max_bytes=100)
+
+    def refuse(src, dst):
+        raise PermissionError("file is open in another process")
+
+    monkeypatch.setattr(query_log.os, "replace", refuse)
+    for i in range(3):
+        logger.log(f"question {i}", "fibonacci", 2, 1.0)
+        wait_written(logger, i + 1)
+    monkeypatch.undo()
+    logger.log("after the failure", "fibonacci", 3, 1.0)
+    wait_written(logger, 4)
+    assert logger._thread.is_alive()
+    logger.close()
+    assert logger.written == 4 and logger.dropped == 0
+    assert len(read_records(path)) == 4
+
+
+def test_processes_sharing_a_log_lose_nothing(tmp_path):
+    path = tmp_path / "queries.jsonl"
+    first = QueryLogger(str(path), max_bytes=1000, backup_count=50)
+    second = QueryLogger(str(path), max_bytes=1000, backup_count=50)
+    for i in range(100):
+        for logger in (first, second):
+            logger.log(f"question {i}", "fibonacci", 2, 1.0)
+            wait_written(logger, i + 1)
+    first.close()
+    second.close()
+    assert len(read_records(path)) == 200
+    assert not (tmp_path / "queries.jsonl.lock").exists()
@@ -0,0 +1,55 @@
+# tokenizer_loader.py
+"""
+Import-light tokenizer loading for CompleteGPTOSSTutor
+`transformers` takes seconds to import, yet the tutor only ever calls
+`encode`. The tokenizer is therefore loaded straight from the model's
+`tokenizer.json` through the small `tokenizers` runtime when it is installed;
+`transformers.AutoTokenizer` is only imported as a fallback.
+"""
+
+import os
+import time
+
+
+class FastTokenizer:
+    """`tokenizers.Tokenizer` with the `encode` signature the tutor expects"""
+
+    def __init__(self, tokenizer):
+        self._tokenizer = tokenizer
+
+    def encode(self, text: str, add_special_tokens: bool = True) -> list:
+        return self._tokenizer.encode(text, add_special_tokens=add_special_tokens).ids
+
+
+def load_tokenizer(model_path: str, timings: dict = None, backend: str = None):
+    """
+    Return (tokenizer, backend name). Import and load times are recorded in
+    `timings` when given. Raises if neither backend can load the model.
+    `backend` is a hint from a previous start with the same tokenizer files:
+    "transformers" skips the tokenizers attempt, "none" skips loading entirely.
+    """
+    timings = {} if timings is None else timings
+    if backend == "none":
+        raise RuntimeError("skipped, it failed to load at the last start and its files are unchanged")
+    tokenizer_json = os.path.join(model_path, "tokenizer.json")
+
+    if backend != "transformers" and os.path.isfile(tokenizer_json):
+        started = time.perf_counter()
+        try:
+            from tokenizers import Tokenizer
+        except ImportError:
+            Tokenizer = None
+        timings["import tokenizers"] = time.perf_counter() - started
+        if Tokenizer is not None:
+            started = time.perf_counter()
+            tokenizer = FastTokenizer(Tokenizer.from_file(tokenizer_json))
+            timings["load tokenizer.json"] = time.perf_counter() - started
+            return tokenizer, "tokenizers"
+
+    started = time.perf_counter()
+    from transformers import AutoTokenizer
+    timings["import transformers"] = time.perf_counter() - started
+    started = time.perf_counter()
+    tokenizer = AutoTokenizer.from_pretrained(model_path, local_files_only=True)
+    timings["load AutoTokenizer"] = time.perf_counter() - started
+    return tokenizer, "transformers"
@@ -0,0 +1,114 @@
+# topics.py
+"""
+Compact topic records for the prepared knowledge base
+knowledge_base.py stays a plain dict literal; load_topics() turns it into a
+TopicTable:
+ - one Topic per topic with __slots__: an integer id, the interned name and
+   patterns, the compiled matchers and the content digest
+ - a Topic references the dict literal's own code and explanation strings
+   instead of copying them, so the text is held once however long the
+   knowledge_base module stays imported; a topic costs one small object
+   instead of two dicts and a list
+ - name -> id lookups go through one dict of interned names
+The table is also a read-only Mapping of topic name -> {"patterns", "code",
+"explanation"}, so code written against the dict literal keeps working.
+"""
+
+import hashlib
+import sys
+from collections.abc import Mapping
+
+from matcher import compile_pattern
+
+
+def topic_digest(data: dict) -> str:
+    """Content hash of one topic; unchanged digest means nothing to rebuild"""
+    payload = repr((list(data["patterns"]), data["code"], data["explanation"]))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Topic:
+    """One knowledge base topic; code and explanation are None when a packed table decodes them"""
+
+    __slots__ = ("id", "name", "patterns", "matchers", "digest", "code", "explanation")
+
+    def __init__(self, topic_id: int, name: str, patterns: tuple, matchers: tuple, digest: str,
+                 code: str = None, explanation: str = None):
+        self.id = topic_id
+        self.name = name
+        self.patterns = patterns
+        self.matchers = matchers
+        self.digest = digest
+        self.code = code
+        self.explanation = explanation
+
+    def __getstate__(self):
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __setstate__(self, state):
+        for slot, value in zip(self.__slots__, state):
+            setattr(self, slot, value)
+
+    def __repr__(self) -> str:
+        return f"Topic({self.id}, {self.name!r}, {len(self.patterns)} patterns)"
+
+
+class TopicTable(Mapping):
+    """Ordered Topic records; a Mapping of legacy topic dicts"""
+
+    # True when code/explanation are decoded on demand (snippet_store.PackedTopicTable)
+    lazy = False
+
+    def __init__(self, records: list):
+        self.records = records
+        self.ids = {topic.name: topic.id for topic in records}
+
+    def topic(self, name: str) -> Topic:
+        return self.records[self.ids[name]]
+
+    def code(self, topic: Topic) -> str:
+        return topic.code
+
+    def explanation(self, topic: Topic) -> str:
+        return topic.explanation
+
+    def as_dict(self, topic: Topic) -> dict:
+        """The topic in knowledge_base.py's dict shape"""
+        return {"patterns": list(topic.patterns), "code": self.code(topic),
+                "explanation": self.explanation(topic)}
+
+    def __getitem__(self, name: str) -> dict:
+        return self.as_dict(self.records[self.ids[name]])
+
+    def __contains__(self, name) -> bool:
+        return name in self.ids
+
+    def __iter__(self):
+        return (topic.name for topic in self.records)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+
+def load_topics(knowledge_base, previous: TopicTable = None) -> TopicTable:
+    """
+    Build a TopicTable from the knowledge_base dict literal (a TopicTable is
+    returned as is, a snippet_store.SnippetStore builds its own packed table).
+    Compiled matchers are reused from `previous` for topics whose content is
+    unchanged.
+    """
+    if isinstance(knowledge_base, TopicTable):
+        return knowledge_base
+    if hasattr(knowledge_base, "topic_table"):
+        return knowledge_base.topic_table(previous)
+    reuse = {topic.digest: topic.matchers for topic in previous.records} if previous else {}
+    records = []
+    for topic_id, (name, data) in enumerate(knowledge_base.items()):
+        digest = topic_digest(data)
+        patterns = tuple(sys.intern(p) for p in data["patterns"])
+        matchers = reuse.get(digest)
+        if matchers is None:
+            matchers = tuple(compile_pattern(p) for p in patterns)
+        records.append(Topic(topic_id, sys.intern(name), patterns, matchers, digest,
+                             data["code"], data["explanation"]))
+    return TopicTable(records)
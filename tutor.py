@@ -1,62 +1,365 @@
 # tutor.py
 """
 Tutor - Complete GPT-OSS Programming Tutor (using external knowledge_base.py)
+Heavy dependencies (tokenizers / transformers) are only imported by the
+background tokenizer loader, so importing this module and constructing the
+tutor stay fast. Run `python tutor.py --startup-report` to see where
+startup time goes.
 """
 
-from transformers import AutoTokenizer
+import time
+_IMPORT_STARTED = time.perf_counter()
+
+import os
+import threading
 from colorama import Fore, Style, init
-import re
-from knowledge_base import knowledge_base
+from sections import strip_fences
+from matcher import MAX_MATCH_CHARS, count_tokens, match_window
+from code_review import format_findings, review_text
+from kb_state import LazyRendered, build_snapshot
+from tokenizer_loader import load_tokenizer
+from warm_start import load_warm_snapshot, save_warm_snapshot, snapshot_key
 
 init(autoreset=True)
 
 MODEL_PATH = r"C:\\Users\\user\\Downloads\\python_tutor\\gpt-oss-20b"
+KNOWLEDGE_BASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge_base.py")
+# Serve snippets from a compressed pack (snippet_store.py) instead of knowledge_base.py
+SNIPPET_PACK_PATH = os.environ.get("TUTOR_SNIPPET_PACK")
+
+_IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
 
 class CompleteGPTOSSTutor:
-    def __init__(self):
+    def __init__(self, warm_start: bool = True):
         print(Fore.YELLOW + "[INFO] Initializing Complete GPT-OSS Programming Tutor..." + Style.RESET_ALL)
+        self.startup_timings = {"import tutor modules": _IMPORT_SECONDS}
+
+        # Load external knowledge base as a prepared snapshot (matchers, section
+        # index, rendered responses); hot reload replaces it as a whole.
+        # A warm-start snapshot from a previous launch is reused when the
+        # knowledge base, snapshot code and tokenizer files are unchanged.
+        started = time.perf_counter()
+        self.warm_start = warm_start
+        self.kb_paths = [os.path.abspath(SNIPPET_PACK_PATH)] if SNIPPET_PACK_PATH else [KNOWLEDGE_BASE_PATH]
+        warm_key = snapshot_key(self.kb_paths, MODEL_PATH) if warm_start else None
+        cached = load_warm_snapshot(warm_key) if warm_start else None
+        if cached:
+            self.snapshot, tokenizer_handle = cached
+            if isinstance(self.snapshot.rendered, LazyRendered):
+                # The renderer is not part of the pickle; use this tutor's
+                self.snapshot.rendered.render = self.render_topic
+            self.startup_timings["load warm-start snapshot"] = time.perf_counter() - started
+        else:
+            if SNIPPET_PACK_PATH:
+                from snippet_store import load_snippet_pack
+                source = load_snippet_pack(SNIPPET_PACK_PATH)
+            else:
+                # Imported only here: in pack mode the dict literal is never loaded
+                from knowledge_base import knowledge_base as source
+            self.snapshot, tokenizer_handle = self.prepare_snapshot(source), None
+            self.startup_timings["prepare knowledge base"] = time.perf_counter() - started
+        self.kb_watcher = None
+
+        # Set before the tokenizer thread starts, which reads it when done (see enable_shared_cache)
+        self.response_cache = None
 
-        # Load GPT-OSS tokenizer
+        # Load GPT-OSS tokenizer in the background; the first query waits for it
+        self._tokenizer = None
+        self._tokenizer_pending = True
+        self.tokenizer_backend = None
+        self._tokenizer_thread = threading.Thread(
+            target=self._load_tokenizer, name="tokenizer-loader", daemon=True,
+            args=(warm_key, self.snapshot, (tokenizer_handle or {}).get("backend"))
+        )
+        self._tokenizer_thread.start()
+        # Long pastes are windowed to max_match_chars for matching (None = no cap)
+        self.max_match_chars = MAX_MATCH_CHARS
+        # Return a single function/class when the query names one
+        self.section_retrieval = True
+        # Flag slow patterns (naive recursion, readlines, += in loops, ...) in pasted code
+        self.performance_review = True
+        # Optional SQLite cache shared by all tutor processes ($TUTOR_SHARED_CACHE=1 or a path)
+        shared_cache = os.environ.get("TUTOR_SHARED_CACHE")
+        if shared_cache:
+            self.enable_shared_cache(None if shared_cache == "1" else shared_cache)
+        # Optional structured query log ($TUTOR_QUERY_LOG=1 or a path)
+        self.query_log = None
+        query_log = os.environ.get("TUTOR_QUERY_LOG")
+        if query_log:
+            self.enable_query_log(None if query_log == "1" else query_log)
+        # Optional admission control for shared tutors ($TUTOR_ADMISSION=1); see answer()
+        self.admission = None
+        if os.environ.get("TUTOR_ADMISSION"):
+            self.enable_admission()
+        # Optional shadow comparison of a candidate matcher (see enable_shadow)
+        self.shadow = None
+        # Optional local generator for retrieval misses ($TUTOR_GENERATION=stub or llama:PATH)
+        self.generator = None
+        if os.environ.get("TUTOR_GENERATION"):
+            self.enable_generation(os.environ["TUTOR_GENERATION"])
+        # Sandbox workers for "run example"; started on first use or via start_example_pool()
+        self.example_pool = None
+        self.last_topic = None
+        self.conversation_history = []
+        self.max_history = 5
+
+    def _load_tokenizer(self, warm_key=None, snapshot=None, hint=None):
+        timings = {}
         try:
-            self.tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH, local_files_only=True)
-            print(Fore.GREEN + "[SUCCESS] GPT-OSS tokenizer loaded successfully!" + Style.RESET_ALL)
+            tokenizer, backend = load_tokenizer(MODEL_PATH, timings, backend=hint)
+            print(Fore.GREEN + f"[SUCCESS] GPT-OSS tokenizer loaded successfully! ({backend})" + Style.RESET_ALL)
         except Exception as e:
             print(Fore.RED + f"[WARNING] Failed to load tokenizer: {e}" + Style.RESET_ALL)
-            self.tokenizer = None
+            tokenizer, backend = None, None
+        self.startup_timings.update({f"{phase} (background)": t for phase, t in timings.items()})
+        if self._tokenizer_pending:
+            self._tokenizer, self.tokenizer_backend = tokenizer, backend
+            self._tokenizer_pending = False
+        # Deferred by enable_shared_cache(): the cache version includes the tokenizer backend
+        if self.response_cache is not None:
+            self.response_cache.invalidate_other_versions(self.cache_version())
+        # Persist the prepared state (and how the tokenizer loaded) for the next launch
+        if warm_key and (backend or "none") != hint:
+            save_warm_snapshot(warm_key, snapshot, {"backend": backend or "none"})
 
-        # Load external knowledge base
-        self.knowledge_base = knowledge_base
-        self.conversation_history = []
-        self.max_history = 5
+    @property
+    def tokenizer(self):
+        """GPT-OSS tokenizer (None if unavailable); waits for the background load"""
+        if self._tokenizer_pending:
+            self._tokenizer_thread.join()
+        return self._tokenizer
+
+    @tokenizer.setter
+    def tokenizer(self, value):
+        self._tokenizer_pending = False
+        self._tokenizer = value
+
+    def startup_report(self) -> str:
+        """Where startup time went, including the background tokenizer load"""
+        _ = self.tokenizer
+        lines = ["Startup time report:"]
+        for phase, seconds in self.startup_timings.items():
+            lines.append(f"  {phase:<40} {seconds * 1000:8.1f} ms")
+        lines.append(f"  tokenizer backend: {self.tokenizer_backend or 'none (word-count fallback)'}")
+        lines.append("For a per-module breakdown run: python -X importtime tutor.py --startup-report")
+        return "\n".join(lines)
+
+    @property
+    def knowledge_base(self) -> dict:
+        return self.snapshot.knowledge_base
+
+    @staticmethod
+    def render_topic(data: dict) -> str:
+        """Response text for a topic, minus the per-query token count"""
+        return (data["code"] + "\n\n" +
+                Fore.GREEN + "Explanation: " + Style.RESET_ALL + data["explanation"])
+
+    def prepare_snapshot(self, knowledge_base: dict, previous=None):
+        """Compile a knowledge base into a snapshot ready to be swapped in"""
+        return build_snapshot(knowledge_base, self.render_topic, previous)
+
+    def swap_snapshot(self, snapshot, kb_paths: list = None) -> None:
+        """Atomically replace the live snapshot and persist it for warm starts"""
+        self.snapshot = snapshot
+        if self.response_cache is not None:
+            self.response_cache.invalidate_other_versions(self.cache_version(snapshot))
+        if self.warm_start:
+            paths = kb_paths or self.kb_paths
+            handle = {"backend": self.tokenizer_backend or "none"}
+            save_warm_snapshot(snapshot_key(paths, MODEL_PATH), snapshot, handle)
+
+    def start_hot_reload(self, paths: list = None, interval: float = 1.0):
+        """Watch the knowledge base file(s) and swap in changes without a restart"""
+        if self.kb_watcher is None:
+            from kb_watch import KnowledgeBaseWatcher
+            self.kb_watcher = KnowledgeBaseWatcher(self, paths=paths or self.kb_paths, interval=interval).start()
+        return self.kb_watcher
 
     def analyze_with_gpt_oss_tokenizer(self, query: str) -> int:
         """Tokenize query or fallback to word count"""
         try:
             if self.tokenizer:
-                return len(self.tokenizer.encode(query))
+                return count_tokens(self.tokenizer, query)
             return len(query.split())
         except Exception:
             return len(query.split())
 
-    def find_best_match(self, query: str):
+    def find_best_match(self, query: str, snapshot=None):
         """Simple regex-based matching"""
-        query_lower = query.lower()
-        for concept, data in self.knowledge_base.items():
-            for pattern in data["patterns"]:
-                if re.search(pattern, query_lower):
-                    return concept
+        snapshot = snapshot or self.snapshot
+        query_lower = match_window(query, self.max_match_chars).lower()
+        for topic in snapshot.topics.records:
+            for matcher in topic.matchers:
+                if matcher.search(query_lower):
+                    return topic.name
         return None
 
-    def generate_response(self, query: str):
+    def find_section(self, query: str, topic: str = None, snapshot=None):
+        """Single function/class of a topic the query asks for, if any"""
+        if not self.section_retrieval:
+            return None
+        snapshot = snapshot or self.snapshot
+        query = match_window(query, self.max_match_chars)
+        if topic is not None:
+            return snapshot.section_index.best_section(query, topic)
+        # No topic pattern hit: only trust multi-word names like prime_factors
+        return snapshot.section_index.best_section(query, min_words=2)
+
+    def resolve_query(self, query: str, snapshot=None):
+        """
+        (topic, section, token_count) for a query; topic is None on a miss.
+        Served from the shared on-disk cache when one is enabled.
+        """
+        snapshot = snapshot or self.snapshot
+        cache = self.response_cache
+        if cache is not None:
+            version = self.cache_version(snapshot)
+            hit = cache.get(version, query)
+            if hit is not None:
+                topic, section_name, token_count = hit
+                if topic is None or topic in snapshot.knowledge_base:
+                    sections = snapshot.section_index.sections.get(topic, [])
+                    section = next((s for s in sections if s.name == section_name), None)
+                    return topic, section, token_count
+
         token_count = self.analyze_with_gpt_oss_tokenizer(query)
-        matched = self.find_best_match(query)
+        matched = self.find_best_match(query, snapshot)
+        section = self.find_section(query, matched, snapshot)
+        if section and not matched:
+            matched = section.topic
+        if cache is not None:
+            cache.put(version, query, matched, section.name if section else None, token_count)
+        return matched, section, token_count
+
+    def generate_response(self, query: str):
+        started = time.perf_counter()
+        # One snapshot for the whole request, even if a reload swaps it meanwhile
+        snapshot = self.snapshot
+        matched, section, token_count = self.resolve_query(query, snapshot)
+        if self.shadow is not None:
+            self.shadow.submit(query, snapshot)
+        response, generated = self._build_response(query, snapshot, matched, section, token_count)
+        # Logged once the response exists, so "ms" covers review, rendering and generation
+        if self.query_log is not None:
+            self.query_log.log(query, matched, token_count, (time.perf_counter() - started) * 1000, generated)
+        return response
+
+    def _build_response(self, query: str, snapshot, matched, section, token_count: int):
+        """(response text, whether the local generator wrote it)"""
+        findings = review_text(query) if self.performance_review else []
+        review = format_findings(findings, snapshot.knowledge_base) if findings else ""
         if matched:
-            data = self.knowledge_base[matched]
-            return (data["code"] + "\n\n" + 
-                    Fore.GREEN + "Explanation: " + Style.RESET_ALL + data["explanation"] +
-                    f"\n\n{Fore.YELLOW}[Processed {token_count} tokens]{Style.RESET_ALL}")
-        else:
-            return f"Sorry, I don't have code for '{query}'. Try asking about Fibonacci, BankAccount class, file ops, etc."
+            self.last_topic = matched
+            if section:
+                topics = snapshot.topics
+                explanation = topics.explanation(topics.topic(matched))
+                text = self.render_topic({"code": section.render(), "explanation": explanation})
+            else:
+                text = snapshot.rendered[matched]
+            if review:
+                text += "\n\n" + review
+            return text + f"\n\n{Fore.YELLOW}[Processed {token_count} tokens]{Style.RESET_ALL}", False
+        if review:
+            return review + f"\n\n{Fore.YELLOW}[Processed {token_count} tokens]{Style.RESET_ALL}", False
+        if self.generator is not None:
+            result = self.generator.respond(query, snapshot.knowledge_base)
+            if result["status"] == "ok":
+                status = "cached" if result["cached"] else f"{result['seconds']:.2f}s"
+                return (result["text"] + f"\n\n{Fore.YELLOW}[Generated locally by {self.generator.backend.name}, "
+                        f"{result['tokens']} tokens, {status}]{Style.RESET_ALL}"), True
+        shown = query if len(query) <= 80 else query[:77] + "..."
+        return (f"Sorry, I don't have code for '{shown}'. Try asking about Fibonacci, BankAccount class, "
+                "file ops, etc."), False
+
+    def answer(self, query: str, session: str = "local", interactive: bool = True) -> str:
+        """
+        generate_response behind admission control when it is enabled: rate
+        limited per session, bounded queue, interactive ahead of batch
+        """
+        if self.admission is None:
+            return self.generate_response(query)
+        from admission import BATCH, INTERACTIVE
+        return self.admission.submit(query, session, INTERACTIVE if interactive else BATCH)
+
+    def enable_admission(self, **limits):
+        """Put a rate-limited, prioritized queue in front of generate_response"""
+        if self.admission is None:
+            from admission import AdmissionController
+            self.admission = AdmissionController(self, **limits)
+        return self.admission
+
+    def enable_generation(self, backend="stub", **options):
+        """
+        Answer retrieval misses with a local generator: a spec ("stub",
+        "llama:PATH") or a GenerationBackend; `options` go to Generator
+        (max_prompt_tokens, max_new_tokens, timeout, cache_size)
+        """
+        from generation import Generator, make_backend
+        if isinstance(backend, str):
+            backend = make_backend(backend)
+        self.generator = Generator(backend, self.analyze_with_gpt_oss_tokenizer, **options)
+        return self.generator
+
+    def enable_shadow(self, candidate="combined", report_path: str = None):
+        """Compare a candidate matcher with find_best_match on live queries, in the background"""
+        if self.shadow is None:
+            import shadow
+            self.shadow = shadow.enable(self, candidate, report_path)
+        return self.shadow
+
+    def enable_shared_cache(self, path: str = None, max_rows: int = None):
+        """Share query results with other tutor processes through SQLite"""
+        from response_cache import DEFAULT_MAX_ROWS, SharedResponseCache
+        self.response_cache = SharedResponseCache(path, max_rows or DEFAULT_MAX_ROWS)
+        # While the tokenizer still loads, _load_tokenizer prunes once it is done
+        # (cache_version() would wait for it here and undo the fast start)
+        if not self._tokenizer_pending:
+            self.response_cache.invalidate_other_versions(self.cache_version())
+        return self.response_cache
+
+    def enable_query_log(self, path: str = None):
+        """Log every query (hash, topic, tokens, latency, miss) from a background thread"""
+        from query_log import QueryLogger
+        from warm_start import cache_dir
+        self.query_log = QueryLogger(path or os.path.join(cache_dir(), "logs", "queries.jsonl"))
+        return self.query_log
+
+    def cache_version(self, snapshot=None) -> str:
+        """Everything besides the query that decides a cached answer"""
+        snapshot = snapshot or self.snapshot
+        backend = self.tokenizer_backend if self.tokenizer is not None else None
+        return f"{snapshot.version}:{self.section_retrieval}:{self.max_match_chars}:{backend}"
+
+    def start_example_pool(self, size: int = 2):
+        """Pre-warm sandbox workers so the first "run example" is instant"""
+        if self.example_pool is None:
+            from sandbox import SnippetPool
+            self.example_pool = SnippetPool(size=size)
+        return self.example_pool
+
+    def run_example(self, topic: str = None) -> str:
+        """Run a topic's snippet (default: the last answered one) in the sandbox"""
+        topic = topic or self.last_topic
+        if topic not in self.knowledge_base:
+            return "Ask about a topic first, then type 'run' to see its example output."
+
+        result = self.start_example_pool().run(strip_fences(self.knowledge_base[topic]["code"]))
+        output = result["output"].rstrip() or "(no output)"
+        status = "cached" if result["cached"] else f"{result['seconds']:.2f}s"
+        response = f"Output of the {topic} example:\n\n{output}"
+        if not result["ok"]:
+            response += f"\n\n{Fore.RED}[Example failed]{Style.RESET_ALL} {result['error'].rstrip()}"
+        return response + f"\n\n{Fore.YELLOW}[Sandboxed run, {status}]{Style.RESET_ALL}"
+
+    def benchmark_topic(self, topic: str = None) -> str:
+        """Measure how a topic's variants (e.g. fibonacci vs fibonacci_memo) scale with n"""
+        from variant_bench import benchmark_code, format_report
+
+        topic = topic or self.last_topic
+        if topic not in self.knowledge_base:
+            return "Ask about a topic first, then type 'benchmark' to compare its variants."
+        result = benchmark_code(self.knowledge_base[topic]["code"])
+        return format_report(topic, result)
 
     def chat(self):
         print(Fore.CYAN + "="*70)
@@ -69,7 +372,12 @@ class CompleteGPTOSSTutor:
                 if user_input.lower() in ["exit", "quit", "bye"]:
                     print(Fore.MAGENTA + "👋 Goodbye!" + Style.RESET_ALL)
                     break
-                response = self.generate_response(user_input)
+                if user_input.lower() in ["run", "run example"]:
+                    response = self.run_example()
+                elif user_input.lower() in ["benchmark", "bench"]:
+                    response = self.benchmark_topic()
+                else:
+                    response = self.answer(user_input)
                 print(Fore.MAGENTA + "\n🤖 Tutor > " + Style.RESET_ALL)
                 print(response)
             except KeyboardInterrupt:
@@ -79,5 +387,24 @@ class CompleteGPTOSSTutor:
                 print(Fore.RED + f"Error: {e}" + Style.RESET_ALL)
 
 if __name__ == "__main__":
+    import sys
+
     tutor = CompleteGPTOSSTutor()
+    if "--startup-report" in sys.argv:
+        print(tutor.startup_report())
+        sys.exit(0)
+    if "--watch" in sys.argv:
+        tutor.start_hot_reload()
+    if "--shared-cache" in sys.argv:
+        tutor.enable_shared_cache()
+    if "--query-log" in sys.argv:
+        tutor.enable_query_log()
+    if "--admission" in sys.argv:
+        tutor.enable_admission()
+    if "--generate" in sys.argv[1:-1]:
+        tutor.enable_generation(sys.argv[sys.argv.index("--generate") + 1])
+    if "--shadow" in sys.argv[1:-1]:
+        from warm_start import cache_dir
+        tutor.enable_shadow(sys.argv[sys.argv.index("--shadow") + 1],
+                            os.path.join(cache_dir(), "shadow-report.json"))
     tutor.chat()
@@ -0,0 +1,334 @@
+# variant_bench.py
+"""
+Measured complexity of the algorithm variants in a knowledge base topic
+For a topic like fibonacci (fibonacci / fibonacci_memo / fibonacci_iterative)
+or prime_numbers (is_prime / is_prime_optimized / generate_primes / ...):
+ - every top-level function taking one int (other parameters defaulted) is
+   benchmarked in a sandbox worker (sandbox.SnippetPool: separate process,
+   CPU / memory / wall-clock limits), with the snippet's __main__ demo removed
+ - input sizes double until a call gets slow; once growth looks exponential
+   the sizes step linearly instead, so fibonacci(n) stops in time
+ - each curve is fitted as a power law (n^k) and as an exponential (b^n) in
+   log space and labelled with the better fit
+ - results are cached per snippet version (hash of the code and harness) in
+   memory and on disk, so asking again is instant
+ - the curves are plotted as ASCII, or to a PNG when matplotlib is installed
+
+Usage:
+    python variant_bench.py fibonacci [--png fib.png]
+In the CLI tutor, type `benchmark` after an answer.
+"""
+
+import argparse
+import ast
+import json
+import math
+import os
+import platform
+import sys
+import threading
+
+from sandbox import SnippetPool, snippet_hash
+from sections import strip_fences
+
+HARNESS_VERSION = 1
+# Total CPU seconds the harness may spend per topic; the sandbox kills at sandbox.CPU_SECONDS
+TOTAL_BUDGET = 3.5
+# Stop growing a function's input once one call takes this long
+CALL_BUDGET = 0.15
+MAX_N = 1 << 40
+# Functions whose slow case is a prime input rather than any n
+PRIME_INPUT = {"is_prime", "is_prime_optimized", "prime_factors"}
+
+_HARNESS = r'''
+import json as _json, math, time as _time
+
+def _is_prime(n):
+    # Deterministic Miller-Rabin for n < 3.3e24, so picking inputs costs nothing
+    if n < 2:
+        return False
+    for p in (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41):
+        if n % p == 0:
+            return n == p
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d, s = d // 2, s + 1
+    for a in (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41):
+        x = pow(a, d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+def _next_prime(n):
+    while not _is_prime(n):
+        n += 1
+    return n
+
+def _time_call(fn, arg):
+    # Best of 3 timings, each looping long enough (~3 ms) to be above timer noise
+    start = _time.perf_counter()
+    fn(arg)
+    once = _time.perf_counter() - start
+    number = max(1, min(100000, int(0.003 / max(once, 1e-7))))
+    best = once
+    for _ in range(3 if once < 0.02 else 1):
+        start = _time.perf_counter()
+        for _ in range(number):
+            fn(arg)
+        best = min(best, (_time.perf_counter() - start) / number)
+    return best
+
+def _bench(config):
+    results = {}
+    for name, prime_input in config["functions"]:
+        fn, points, error = globals()[name], [], None
+        n, prev, prev_n, step = 1, None, 1, None
+        deadline = _time.perf_counter() + config["fn_budget"]
+        while n <= config["max_n"] and _time.perf_counter() < deadline:
+            arg = _next_prime(n) if prime_input else n
+            try:
+                t = _time_call(fn, arg)
+            except RecursionError:
+                error = f"RecursionError at n={n}"
+                break
+            except Exception as e:
+                error = f"{type(e).__name__} at n={n}: {e}"
+                break
+            points.append([arg, t])
+            if t > config["call_budget"]:
+                break
+            # Growing faster than n^4 between sizes: treat as exponential, step linearly
+            if prev and step is None and t > 1e-5 and math.log(t / prev) > 4 * math.log(n / prev_n):
+                step = max(1, n // 8)
+            # Below timer resolution, take bigger strides to reach sizes that matter
+            next_n = n + step if step else n * (4 if t < 1e-5 else 2)
+            if step and prev:
+                predicted = t * (t / prev)
+            elif prev:
+                exponent = max(0.0, math.log(max(t, 1e-9) / max(prev, 1e-9)) / math.log(n / prev_n))
+                predicted = t * (next_n / n) ** exponent
+            else:
+                predicted = t * 4
+            if predicted > config["call_budget"] * 2:
+                break
+            prev, prev_n, n = t, n, next_n
+        results[name] = {"points": points, "error": error}
+    print("BENCH_JSON:" + _json.dumps(results))
+
+_bench(_json.loads(_CONFIG))
+'''
+
+_cache = {}
+_cache_lock = threading.Lock()
+_pool = None
+
+
+def _strip_main_block(source: str) -> str:
+    """Drop top-level `if __name__ == "__main__":` blocks (the snippet's demo)"""
+    tree = ast.parse(source)
+    lines = source.split("\n")
+    for node in reversed(tree.body):
+        if (isinstance(node, ast.If) and isinstance(node.test, ast.Compare)
+                and isinstance(node.test.left, ast.Name) and node.test.left.id == "__name__"):
+            del lines[node.lineno - 1:node.end_lineno]
+    return "\n".join(lines)
+
+
+def int_functions(source: str) -> list:
+    """Top-level functions callable as f(n) with an int n"""
+    names = []
+    for node in ast.parse(source).body:
+        if not isinstance(node, ast.FunctionDef):
+            continue
+        args = node.args.posonlyargs + node.args.args
+        if not args:
+            continue
+        annotation = args[0].annotation
+        if not (isinstance(annotation, ast.Name) and annotation.id == "int"):
+            continue
+        if len(args) - len(node.args.defaults) > 1 or node.args.kwonlyargs and \
+                len(node.args.kw_defaults) != len([d for d in node.args.kw_defaults if d is not None]):
+            continue
+        names.append(node.name)
+    return names
+
+
+def _fit(points: list) -> dict:
+    """Best of power law and exponential over the measurable (>= 5 us) points"""
+    usable = [(n, t) for n, t in points if t >= 5e-6 and n > 0][-8:]
+    if len(usable) < 3:
+        return {"label": "too fast to measure", "model": None}
+
+    def regress(xs, ys):
+        mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+        sxx = sum((x - mx) ** 2 for x in xs)
+        slope = sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / sxx if sxx else 0.0
+        residual = sum((y - my - slope * (x - mx)) ** 2 for x, y in zip(xs, ys))
+        return slope, residual
+
+    log_t = [math.log(t) for _, t in usable]
+    k, power_res = regress([math.log(n) for n, _ in usable], log_t)
+    rate, exp_res = regress([float(n) for n, _ in usable], log_t)
+    base = math.exp(rate)
+    if base > 1.05 and exp_res < power_res * 0.5:
+        return {"label": f"O({base:.2f}^n)", "model": "exponential", "base": base}
+    names = [(0.0, "O(1)"), (0.5, "O(sqrt n)"), (1.0, "O(n)"), (2.0, "O(n^2)"), (3.0, "O(n^3)")]
+    nearest = min(names, key=lambda item: abs(item[0] - k))[1]
+    return {"label": f"{nearest}  (fitted n^{k:.2f})", "model": "power", "exponent": k}
+
+
+def _cache_path(key: str) -> str:
+    from warm_start import cache_dir
+    directory = os.path.join(cache_dir(), "bench")
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"{key[:24]}.json")
+
+
+def benchmark_code(code: str, pool: SnippetPool = None) -> dict:
+    """{"functions": {name: {points, error, fit}}, "error": ..., "cached": bool} for a snippet"""
+    global _pool
+    source = _strip_main_block(strip_fences(code))
+    key = snippet_hash(f"{HARNESS_VERSION}|{platform.python_version()}|{source}")
+    with _cache_lock:
+        if key in _cache:
+            return dict(_cache[key], cached=True)
+    try:
+        with open(_cache_path(key), encoding="utf-8") as f:
+            result = json.load(f)
+        with _cache_lock:
+            _cache[key] = result
+        return dict(result, cached=True)
+    except (OSError, ValueError):
+        pass
+
+    names = int_functions(source)
+    if not names:
+        return {"functions": {}, "error": "no functions taking a single int to benchmark", "cached": False}
+    config = {
+        "functions": [[name, name in PRIME_INPUT] for name in names],
+        "fn_budget": TOTAL_BUDGET / len(names),
+        "call_budget": CALL_BUDGET,
+        "max_n": MAX_N,
+    }
+    program = source + "\n\n_CONFIG = " + repr(json.dumps(config)) + "\n" + _HARNESS
+    if pool is None:
+        if _pool is None:
+            _pool = SnippetPool(size=1, cache_size=16)
+        pool = _pool
+    run = pool.run(program)
+    line = next((l for l in reversed(run["output"].splitlines()) if l.startswith("BENCH_JSON:")), None)
+    if line is None:
+        error = (run.get("error") or "benchmark produced no result").strip().splitlines()[-1]
+        return {"functions": {}, "error": error, "cached": False}
+
+    functions = json.loads(line[len("BENCH_JSON:"):])
+    for data in functions.values():
+        data["fit"] = _fit(data["points"])
+    result = {"functions": functions, "error": None}
+    with _cache_lock:
+        _cache[key] = result
+    try:
+        with open(_cache_path(key), "w", encoding="utf-8") as f:
+            json.dump(result, f)
+    except OSError:
+        pass
+    return dict(result, cached=False)
+
+
+def ascii_plot(functions: dict, width: int = 60, height: int = 14) -> str:
+    """Log-log scatter of time per call against n, one letter per function"""
+    series = [(name, [(n, t) for n, t in data["points"] if n > 0 and t > 0])
+              for name, data in functions.items()]
+    series = [(name, pts) for name, pts in series if pts]
+    if not series:
+        return ""
+    xs = [math.log10(n) for _, pts in series for n, _ in pts]
+    ys = [math.log10(t) for _, pts in series for _, t in pts]
+    x0, x1 = min(xs), max(xs) or 1.0
+    y0, y1 = min(ys), max(ys)
+    x1 = x1 if x1 > x0 else x0 + 1
+    y1 = y1 if y1 > y0 else y0 + 1
+    grid = [[" "] * width for _ in range(height)]
+    legend = []
+    for i, (name, pts) in enumerate(series):
+        mark = chr(ord("a") + i)
+        legend.append(f"  {mark} = {name}: {functions[name]['fit']['label']}")
+        for n, t in pts:
+            col = int((math.log10(n) - x0) / (x1 - x0) * (width - 1))
+            row = height - 1 - int((math.log10(t) - y0) / (y1 - y0) * (height - 1))
+            grid[row][col] = mark
+    lines = [f"time per call, {10 ** y1:.1e}s (top) .. {10 ** y0:.1e}s (bottom), log scale"]
+    lines += ["|" + "".join(row) for row in grid]
+    lines.append("+" + "-" * width)
+    lines.append(f" n = {10 ** x0:.0f} .. {10 ** x1:.3g} (log scale)")
+    return "\n".join(lines + legend)
+
+
+def png_plot(functions: dict, path: str, title: str = "") -> bool:
+    """Write a log-log chart with matplotlib; False when it isn't installed"""
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        return False
+    fig, ax = plt.subplots(figsize=(7, 4.5))
+    for name, data in functions.items():
+        pts = [(n, t) for n, t in data["points"] if n > 0 and t > 0]
+        if pts:
+            ax.plot([n for n, _ in pts], [t for _, t in pts], marker="o",
+                    label=f"{name}: {data['fit']['label']}")
+    ax.set_xscale("log")
+    ax.set_yscale("log")
+    ax.set_xlabel("n")
+    ax.set_ylabel("seconds per call")
+    ax.set_title(title)
+    ax.legend(fontsize=8)
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+    return True
+
+
+def format_report(topic: str, result: dict) -> str:
+    if result.get("error"):
+        return f"Could not benchmark {topic}: {result['error']}"
+    lines = [f"Measured scaling of the {topic} variants"
+             + (" (cached)" if result.get("cached") else "") + ":", ""]
+    for name, data in result["functions"].items():
+        largest = data["points"][-1] if data["points"] else None
+        where = f"up to n={largest[0]} ({largest[1] * 1000:.3g} ms/call)" if largest else "no data"
+        note = f"; stopped: {data['error']}" if data.get("error") else ""
+        lines.append(f"  {name:<24} {data['fit']['label']:<32} {where}{note}")
+    lines += ["", ascii_plot(result["functions"])]
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark a topic's algorithm variants")
+    parser.add_argument("topic")
+    parser.add_argument("--png", help="also save a matplotlib chart here")
+    args = parser.parse_args(argv)
+
+    from knowledge_base import knowledge_base
+    if args.topic not in knowledge_base:
+        print(f"Unknown topic '{args.topic}'. Topics: {', '.join(knowledge_base)}")
+        return 1
+    result = benchmark_code(knowledge_base[args.topic]["code"])
+    print(format_report(args.topic, result))
+    if args.png and not result.get("error"):
+        if png_plot(result["functions"], args.png, args.topic):
+            print(f"Chart saved to {args.png}")
+        else:
+            print("matplotlib is not installed; showing the ASCII chart only")
+    return 0 if not result.get("error") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+# warm_start.py
+"""
+Persistent warm-start snapshots for CompleteGPTOSSTutor
+The prepared KnowledgeSnapshot (compiled matchers, section index, rendered
+responses) is pickled to a versioned file in the tutor cache directory,
+together with a handle describing how the tokenizer was loaded. The file is
+keyed by a hash of the knowledge base source, the modules that build the
+snapshot and the tokenizer files, so the next launch reuses it only when
+nothing it depends on has changed.
+The cache directory is per user ($TUTOR_CACHE_DIR or ~/.cache/gpt-oss-tutor);
+snapshots are only ever read from there.
+"""
+
+import glob
+import hashlib
+import importlib.util
+import os
+import pickle
+import tempfile
+
+SNAPSHOT_FORMAT = 2
+KEEP_SNAPSHOTS = 3
+
+# Modules whose code shapes the pickled snapshot
+_SNAPSHOT_MODULES = ("kb_state.py", "matcher.py", "sections.py", "topics.py", "tutor.py")
+_TOKENIZER_FILES = ("tokenizer.json", "tokenizer_config.json")
+
+
+def cache_dir() -> str:
+    """Per-user cache directory shared by the tutor's on-disk caches"""
+    path = os.environ.get("TUTOR_CACHE_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache", "gpt-oss-tutor")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _file_digest(path: str) -> str:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return "missing"
+
+
+def tokenizer_fingerprint(model_path: str) -> str:
+    """
+    Cheap identity of the tokenizer files (path, size, mtime; no 30 MB read)
+    and of which tokenizer libraries are installed (found, not imported)
+    """
+    parts = [os.path.abspath(model_path)]
+    for module in ("tokenizers", "transformers"):
+        parts.append(f"{module}:{importlib.util.find_spec(module) is not None}")
+    for name in _TOKENIZER_FILES:
+        try:
+            st = os.stat(os.path.join(model_path, name))
+            parts.append(f"{name}:{st.st_size}:{st.st_mtime_ns}")
+        except OSError:
+            parts.append(f"{name}:missing")
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def snapshot_key(kb_paths: list, model_path: str) -> str:
+    """Hash of everything a snapshot depends on"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    parts = [f"format:{SNAPSHOT_FORMAT}"]
+    parts += [_file_digest(p) for p in kb_paths]
+    parts += [_file_digest(os.path.join(here, name)) for name in _SNAPSHOT_MODULES]
+    parts.append(tokenizer_fingerprint(model_path))
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def _snapshot_path(key: str) -> str:
+    return os.path.join(cache_dir(), f"snapshot-v{SNAPSHOT_FORMAT}-{key[:16]}.pkl")
+
+
+def load_warm_snapshot(key: str):
+    """Return (snapshot, tokenizer_handle) for this key, or None on a miss"""
+    try:
+        with open(_snapshot_path(key), "rb") as f:
+            payload = pickle.load(f)
+    except Exception:
+        return None
+    if payload.get("format") != SNAPSHOT_FORMAT or payload.get("key") != key:
+        return None
+    return payload["snapshot"], payload.get("tokenizer")
+
+
+def save_warm_snapshot(key: str, snapshot, tokenizer_handle: dict = None) -> bool:
+    """Atomically write a snapshot file and prune old ones; never raises"""
+    try:
+        path = _snapshot_path(key)
+        payload = {"format": SNAPSHOT_FORMAT, "key": key,
+                   "snapshot": snapshot, "tokenizer": tokenizer_handle}
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except BaseException:
+            # e.g. an unpicklable snapshot: leave no half-written file behind
+            os.remove(tmp)
+            raise
+
+        old = sorted(glob.glob(os.path.join(cache_dir(), "snapshot-v*.pkl")),
+                     key=os.path.getmtime, reverse=True)
+        for stale in old[KEEP_SNAPSHOTS:]:
+            os.remove(stale)
+        return True
+    except Exception:
+        return False